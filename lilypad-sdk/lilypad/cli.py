@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+from lilypad.client import LilypadClient
+from lilypad.utils.jsonl import truncate_partial_line
+
+
+def _read_lines(path: str, start_line: int, start_offset: int) -> Iterator[Tuple[int, int, bytes]]:
+    """Yield (line number, byte offset after the line, raw line) from start_offset on"""
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        line_no, offset = start_line, start_offset
+        for raw in f:
+            offset += len(raw)
+            yield line_no, offset, raw
+            line_no += 1
+
+
+def _to_request(record: Any, default_model: str, default_temperature: float) -> Dict[str, Any]:
+    """Accept a bare prompt string, {"prompt": ...} or {"messages": [...]}"""
+    if isinstance(record, str):
+        record = {"prompt": record}
+    messages = record.get("messages") or [{"role": "user", "content": record["prompt"]}]
+    return {
+        "messages": messages,
+        "model": record.get("model", default_model),
+        "temperature": record.get("temperature", default_temperature),
+    }
+
+
+class BatchCheckpoint:
+    """
+    Tracks progress of a batch run so it can resume after interruption.
+
+    Results finish out of order, so the checkpoint stores a watermark: every
+    line before `line` (which starts at byte `offset` of the input) has been
+    written to the output. Lines past the watermark that were already
+    written are recovered from the output file on resume.
+
+    A failed line holds the watermark at that line, so the next run retries
+    it. `processed_offset` keeps advancing past failures for progress
+    reporting.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.line = 0
+        self.offset = 0
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            self.line, self.offset = state["line"], state["offset"]
+        self.processed_offset = self.offset
+        self.blocked_at: Optional[int] = None
+        self._next = self.line
+        self._done_ahead: Set[int] = set()
+        self._offsets: Dict[int, int] = {}
+
+    def track(self, line: int, end_offset: int):
+        self._offsets[line] = end_offset
+
+    def complete(self, line: int):
+        self._done_ahead.add(line)
+        while self._next in self._done_ahead:
+            self._done_ahead.remove(self._next)
+            self.processed_offset = self._offsets.pop(self._next)
+            self._next += 1
+            if self.blocked_at is None or self._next <= self.blocked_at:
+                self.line, self.offset = self._next, self.processed_offset
+
+    def fail(self, line: int):
+        if self.blocked_at is None or line < self.blocked_at:
+            self.blocked_at = line
+        self.complete(line)
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"line": self.line, "offset": self.offset}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _written_past(output_path: str, watermark: int) -> Set[int]:
+    """Line numbers at or past the watermark that already have an output record"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb") as f:
+        for raw in f:
+            try:
+                line = json.loads(raw)["line"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            if line >= watermark:
+                done.add(line)
+    return done
+
+
+def run_batch(args: argparse.Namespace, client: Optional[LilypadClient] = None) -> int:
+    client = client or LilypadClient(args.api_key, timeout=args.timeout)
+    checkpoint = BatchCheckpoint(args.checkpoint or f"{args.output}.checkpoint")
+    truncate_partial_line(args.output)
+    already_written = _written_past(args.output, checkpoint.line)
+    rate_limiter = (
+        InMemoryRateLimiter(requests_per_second=args.rate, check_every_n_seconds=0.01,
+                            max_bucket_size=args.concurrency)
+        if args.rate else None
+    )
+
+    total_bytes = os.path.getsize(args.input)
+    start_offset = checkpoint.offset
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(args.concurrency * 2)
+    stats = {"done": 0, "failed": 0, "skipped": 0, "bytes": 0}
+    start = time.monotonic()
+    last_report = [0.0]
+
+    output = open(args.output, "ab")
+    # Failures are logged here rather than to the output, so a rerun retries them
+    errors_path = f"{args.output}.errors.jsonl"
+    errors = open(errors_path, "w")
+
+    def report(force: bool = False):
+        now = time.monotonic()
+        if not force and now - last_report[0] < 0.5:
+            return
+        last_report[0] = now
+        elapsed = now - start
+        rate = stats["done"] / elapsed if elapsed > 0 else 0.0
+        progress = stats["bytes"] / max(1, total_bytes - start_offset)
+        eta = elapsed * (1 - progress) / progress if progress > 0 else float("inf")
+        sys.stderr.write(
+            f"\r{stats['done']} done, {stats['failed']} failed, {stats['skipped']} resumed | "
+            f"{rate:.1f} req/s | {progress:.1%} | ETA {eta:.0f}s   "
+        )
+        sys.stderr.flush()
+
+    def finish(line: int, result: Optional[Dict[str, Any]], error: Optional[str] = None):
+        with lock:
+            if error is None:
+                output.write(json.dumps(result).encode("utf-8") + b"\n")
+                stats["done"] += 1
+                checkpoint.complete(line)
+            else:
+                errors.write(json.dumps({"line": line, "error": error}) + "\n")
+                stats["failed"] += 1
+                checkpoint.fail(line)
+            stats["bytes"] = checkpoint.processed_offset - start_offset
+            if (stats["done"] + stats["failed"]) % args.checkpoint_every == 0:
+                # Output must reach disk before the checkpoint that vouches for it
+                output.flush()
+                os.fsync(output.fileno())
+                checkpoint.save()
+            report()
+
+    def process(line: int, raw: bytes):
+        try:
+            record = json.loads(raw)
+            request = _to_request(record, args.model, args.temperature)
+            if rate_limiter:
+                rate_limiter.acquire()
+            response = client.chat_completion(**request)
+            result = {"line": line, "response": response}
+            if isinstance(record, dict) and "id" in record:
+                result["id"] = record["id"]
+        except Exception as e:
+            finish(line, None, str(e))
+        else:
+            finish(line, result)
+        finally:
+            in_flight.release()
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for line, end_offset, raw in _read_lines(args.input, checkpoint.line, start_offset):
+                with lock:
+                    checkpoint.track(line, end_offset)
+                if not raw.strip() or line in already_written:
+                    with lock:
+                        stats["skipped"] += line in already_written
+                        checkpoint.complete(line)
+                    continue
+                # Bounds how far reading runs ahead of the workers
+                in_flight.acquire()
+                pool.submit(process, line, raw)
+    finally:
+        with lock:
+            output.flush()
+            os.fsync(output.fileno())
+            output.close()
+            errors.close()
+            checkpoint.save()
+            report(force=True)
+        sys.stderr.write("\n")
+
+    if stats["failed"]:
+        sys.stderr.write(
+            f"{stats['failed']} lines failed (see {errors_path}); rerun the same command to retry them\n"
+        )
+        return 1
+    if os.path.exists(errors_path):
+        os.remove(errors_path)
+    return 0
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="lilypad-sdk", description="Lilypad Python SDK tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="Run resumable bulk chat completions from a JSONL file")
+    batch.add_argument("input", help="JSONL file: one prompt string, {\"prompt\"} or {\"messages\"} per line")
+    batch.add_argument("-o", "--output", required=True, help="JSONL file results are appended to")
+    batch.add_argument("-m", "--model", default="llama3.1:8b", help="Default model for lines without one")
+    batch.add_argument("--temperature", type=float, default=0.6)
+    batch.add_argument("-c", "--concurrency", type=int, default=8, help="Requests in flight")
+    batch.add_argument("--rate", type=float, default=None, help="Max requests per second")
+    batch.add_argument("--timeout", type=float, default=300.0, help="Per-request deadline in seconds")
+    batch.add_argument("--checkpoint", default=None, help="Checkpoint path (default: <output>.checkpoint)")
+    batch.add_argument("--checkpoint-every", type=int, default=50, help="Save the checkpoint every N results")
+    batch.add_argument("--api-key", default=os.getenv("LILYPAD_API_KEY"), help="Defaults to $LILYPAD_API_KEY")
+
+    args = parser.parse_args(argv)
+    if args.command == "batch":
+        if not args.api_key:
+            parser.error("an API key is required (--api-key or LILYPAD_API_KEY)")
+        return run_batch(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
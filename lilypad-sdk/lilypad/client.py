@@ -1,8 +1,69 @@
-from utils import SUPPORTED_MODELS 
+from lilypad.utils import SUPPORTED_MODELS
 
+import os
 import json
-import requests
-from typing import Any, Dict, List, Optional, Union
+import time
+import hashlib
+import socket
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from lilypad.completions import ChatCompletion, ChatCompletionChunk
+from lilypad.resilience import CircuitBreaker, Deadline, DeadlineExceededError, RetryPolicy
+from lilypad.singleflight import SingleFlight
+from lilypad.transport import RequestsTransport, Transport, request_key
+
+logger = logging.getLogger(__name__)
+
+
+def _abort_response(response):
+    """Interrupt a read that another thread is blocked in on a streamed response"""
+    # Closing alone does not wake a thread blocked in recv(); shutting the socket down does
+    connection = getattr(getattr(response, "raw", None), "connection", None)
+    sock = getattr(connection, "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
+
+
+@contextmanager
+def _watch_deadline(deadline: Deadline, response, what: str):
+    """
+    Abort `response` when the deadline passes while its body is being read.
+
+    The socket read timeout is only capped when the request starts, so a
+    stream that stalls between lines would otherwise overrun the deadline.
+    """
+    remaining = deadline.remaining()
+    if remaining is None:
+        yield
+        return
+    expired = threading.Event()
+
+    def expire():
+        expired.set()
+        _abort_response(response)
+
+    timer = threading.Timer(remaining, expire)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    except Exception as e:
+        if expired.is_set():
+            raise DeadlineExceededError(f"Deadline exceeded during {what}") from e
+        raise
+    finally:
+        timer.cancel()
+    if expired.is_set():
+        raise DeadlineExceededError(f"Deadline exceeded during {what}")
 
 
 
@@ -17,23 +78,154 @@ class LilypadClient:
       - Cowsay jobs
 
     This client uses the Lilypad base URL and API key for all requests.
+    Requests go through a pluggable transport (a pooled requests session by
+    default); pass a RecordingTransport or ReplayTransport to capture and
+    replay traffic.
+
+    Every call has connect and read timeouts and an optional total deadline
+    (`timeout`, overridable per call) that also bounds streamed reads.
+    Idempotent GETs are retried with budgeted backoff, and each endpoint
+    (and each chat model) has a circuit breaker that fails fast with
+    CircuitOpenError while the service keeps failing.
+
+    With `coalesce` on (the default), concurrent identical GETs and
+    identical temperature-0 chat completions share one HTTP call; see
+    self.singleflight.stats() for how many calls were saved. Coalesced
+    callers receive the same result object, so treat results as read-only.
     """
 
-    def __init__(self, api_key: str, base_url: str = "https://anura-testnet.lilypad.tech/api/v1"):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://anura-testnet.lilypad.tech/api/v1",
+        transport: Optional[Transport] = None,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 120.0,
+        timeout: Optional[float] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker_failure_threshold: int = 5,
+        breaker_reset_timeout: float = 30.0,
+        coalesce: bool = True,
+    ):
         self.api_key = api_key
         self.base_url = base_url
+        self.transport = transport or RequestsTransport()
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker_failure_threshold = breaker_failure_threshold
+        self.breaker_reset_timeout = breaker_reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
+        self.coalesce = coalesce
+        self.singleflight = SingleFlight()
+        # Racing statistics: wins per model and details of the latest race
+        self.race_wins: Counter = Counter()
+        self.last_race: Optional[Dict[str, Any]] = None
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
         }
 
-    def get_available_models(self) -> List[str]:
+    def _breaker(self, circuit: str) -> CircuitBreaker:
+        with self._breakers_lock:
+            if circuit not in self.breakers:
+                self.breakers[circuit] = CircuitBreaker(
+                    circuit, self.breaker_failure_threshold, self.breaker_reset_timeout
+                )
+            return self.breakers[circuit]
+
+    def _deadline(self, timeout: Optional[float]) -> Deadline:
+        return Deadline(timeout if timeout is not None else self.timeout)
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        circuit: str,
+        json: Optional[Dict[str, Any]] = None,
+        stream: bool = False,
+        deadline: Optional[Deadline] = None,
+    ):
+        """
+        Send a request through the transport with timeouts, the circuit
+        breaker for `circuit`, and (for GETs only) retries on connection
+        errors, 429 and 5xx responses.
+
+        Returns the final response; status checks are left to the caller.
+        """
+        deadline = deadline or Deadline(self.timeout)
+        breaker = self._breaker(circuit)
+        delays = self.retry_policy.delays() if method == "GET" else iter(())
+
+        while True:
+            deadline.check(f"{method} {url}")
+            breaker.before_call()
+            error = None
+            try:
+                response = self.transport.request(
+                    method, url, headers=self.headers, json=json, stream=stream,
+                    timeout=(deadline.cap(self.connect_timeout), deadline.cap(self.read_timeout)),
+                )
+            except OSError as e:
+                # requests' exceptions derive from OSError
+                breaker.record_failure()
+                error = e
+            except Exception:
+                breaker.record_failure()
+                raise
+            else:
+                if response.status_code < 500 and response.status_code != 429:
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+
+            delay = next(delays, None)
+            remaining = deadline.remaining()
+            if delay is None or (remaining is not None and delay >= remaining):
+                if error is None:
+                    return response
+                if deadline.expired():
+                    raise DeadlineExceededError(f"Deadline exceeded during {method} {url}") from error
+                raise error
+            logger.warning(f"Retrying {method} {url} in {delay:.2f}s after {error or response.status_code}")
+            if error is None:
+                response.close()
+            time.sleep(delay)
+
+    def _coalesced(self, key: Any, fn: Callable[[], Any], deadline: Deadline) -> Any:
+        """
+        Run fn, sharing the call with concurrent callers of the same key.
+
+        fn must be bound to this caller's deadline. Waiting for another
+        caller's flight is limited to the time this deadline has left, and
+        if that flight ran out of its own (shorter) deadline, the call is
+        made again rather than failing early.
+        """
+        if not self.coalesce:
+            return fn()
+        while True:
+            try:
+                return self.singleflight.do(key, fn, timeout=deadline.remaining())
+            except DeadlineExceededError:
+                if deadline.expired():
+                    raise
+
+    def _get_json(self, url: str, circuit: str, error_prefix: str, timeout: Optional[float]) -> Any:
+        deadline = self._deadline(timeout)
+
+        def fetch():
+            response = self._request("GET", url, circuit, deadline=deadline)
+            if response.status_code != 200:
+                raise RuntimeError(f"{error_prefix}: {response.status_code} {response.text}")
+            return response.json()
+        return self._coalesced(request_key("GET", url), fetch, deadline)
+
+    def get_available_models(self, timeout: Optional[float] = None) -> List[str]:
         """Call the GET /models endpoint to retrieve a list of available models."""
         url = f"{self.base_url}/models"
-        response = requests.get(url, headers=self.headers)
-        if response.status_code != 200:
-            raise RuntimeError(f"Error fetching models: {response.status_code} {response.text}")
-        result = response.json()
+        result = self._get_json(url, "models", "Error fetching models", timeout)
         # Result is expected to be like: {"data": {"models": [ ... ]}, ...}
         return result.get("data", {}).get("models", [])
 
@@ -43,7 +235,11 @@ class LilypadClient:
         model: str,
         temperature: float = 0.6,
         stream: bool = False,
-    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        typed: bool = False,
+        race: Optional[List[str]] = None,
+        schema: Optional[Any] = None,
+        timeout: Optional[float] = None,
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]], ChatCompletion, List[ChatCompletionChunk]]:
         """
         Invoke the Chat Completion endpoint.
         Supports both streaming (SSE) and a one-shot response.
@@ -53,14 +249,54 @@ class LilypadClient:
             model: The model identifier (must be in SUPPORTED_MODELS)
             temperature: Controls randomness
             stream: Use streaming mode if True
+            typed: Decode into compact ChatCompletion / ChatCompletionChunk
+                objects instead of dicts
+            race: Optional extra models to race against `model`. The same
+                request goes to every candidate (repeat a model to race
+                replicas), the first acceptable response is returned and the
+                other streams are closed. The winner is recorded in
+                self.last_race and self.race_wins.
+            schema: Optional pydantic model; when racing, a response only
+                counts as acceptable if its content validates against it.
+            timeout: Total deadline in seconds, including reading the stream
+                (defaults to the client's timeout)
 
         Returns:
             When not streaming, a dict following the OpenAI chat completion format.
             When streaming, a list of chunk objects.
+            With typed=True, the same shapes as lilypad.completions objects.
         """
-        if model not in SUPPORTED_MODELS:
-            raise ValueError(f"Model '{model}' is not supported. Supported models: {SUPPORTED_MODELS}")
+        candidates = [model] + list(race or [])
+        for candidate in candidates:
+            if candidate not in SUPPORTED_MODELS:
+                raise ValueError(f"Model '{candidate}' is not supported. Supported models: {SUPPORTED_MODELS}")
 
+        deadline = self._deadline(timeout)
+        if race:
+            return self._race_chat_completion(messages, candidates, temperature, stream, typed, schema, deadline)
+        if temperature != 0:
+            return self._chat_request(messages, model, temperature, stream, typed, deadline)
+
+        # Deterministic requests can share one in-flight call. A streamed
+        # response is read once and its chunks handed to every waiter.
+        payload = {"model": model, "messages": messages, "temperature": temperature}
+        key = (request_key("POST", f"{self.base_url}/chat/completions", payload), stream, typed)
+        result = self._coalesced(
+            key, lambda: self._chat_request(messages, model, temperature, stream, typed, deadline), deadline
+        )
+        # Each caller gets its own list of (shared) chunks
+        return list(result) if stream else result
+
+    def _chat_request(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        stream: bool,
+        typed: bool,
+        deadline: Deadline,
+        on_response: Optional[Callable[[Any], None]] = None,
+    ):
         url = f"{self.base_url}/chat/completions"
         payload = {
             "model": model,
@@ -70,36 +306,119 @@ class LilypadClient:
         if stream:
             payload["stream"] = True
 
-        response = requests.post(url, headers=self.headers, json=payload, stream=stream)
+        response = self._request("POST", url, f"chat:{model}", json=payload, stream=stream, deadline=deadline)
+        if on_response:
+            on_response(response)
         if response.status_code != 200:
             raise RuntimeError(f"Chat completion error: {response.status_code} {response.text}")
 
         if stream:
             # For streaming responses we read chunks as server-sent events
             chunks = []
-            for line in response.iter_lines(decode_unicode=True):
-                if line.strip() == "data: [DONE]":
-                    break
-                # Many lines start with 'data: ' so remove that
-                if line.startswith("data: "):
-                    line = line[len("data: "):]
-                if line:
-                    chunk = json.loads(line)
-                    chunks.append(chunk)
+            what = f"streaming chat completion from {model}"
+            with _watch_deadline(deadline, response, what):
+                for line in response.iter_lines():
+                    deadline.check(what)
+                    if line.strip() == b"data: [DONE]":
+                        break
+                    # Many lines start with 'data: ' so remove that
+                    if line.startswith(b"data: "):
+                        line = line[len(b"data: "):]
+                    if line:
+                        chunk = ChatCompletionChunk.from_json(line) if typed else json.loads(line)
+                        chunks.append(chunk)
             return chunks
 
+        if typed:
+            return ChatCompletion.from_json(response.content)
         return response.json()
 
-    def get_image_models(self) -> List[str]:
+    @staticmethod
+    def _completion_text(result, stream: bool) -> str:
+        """The assistant text of a completion or of a list of streamed chunks"""
+        if stream:
+            return "".join(
+                chunk["choices"][0]["delta"].get("content") or ""
+                for chunk in result if chunk["choices"]
+            )
+        return result["choices"][0]["message"]["content"] or ""
+
+    def _race_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        candidates: List[str],
+        temperature: float,
+        stream: bool,
+        typed: bool,
+        schema: Optional[Any],
+        deadline: Deadline,
+    ):
+        responses: Dict[int, Any] = {}
+        lock = threading.Lock()
+        finished = threading.Event()
+
+        def register(index):
+            def on_response(response):
+                with lock:
+                    responses[index] = response
+                    # The race may have been decided while this request was in flight
+                    if finished.is_set():
+                        response.close()
+            return on_response
+
+        def run(index, model):
+            result = self._chat_request(messages, model, temperature, stream, typed, deadline, register(index))
+            if schema is not None:
+                schema.model_validate_json(self._completion_text(result, stream))
+            return result
+
+        start = time.perf_counter()
+        errors: Dict[str, str] = {}
+        pool = ThreadPoolExecutor(max_workers=len(candidates))
+        futures = {pool.submit(run, i, m): (i, m) for i, m in enumerate(candidates)}
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, model = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        errors[f"{index}:{model}"] = str(e)
+                        continue
+
+                    self.race_wins[model] += 1
+                    self.last_race = {
+                        "winner": model,
+                        "winner_index": index,
+                        "candidates": candidates,
+                        "latency_s": time.perf_counter() - start,
+                        "errors": errors,
+                    }
+                    logger.info(f"Race won by {model} (candidate {index}) in {self.last_race['latency_s']:.2f}s")
+                    return result
+            raise RuntimeError(f"All raced models failed: {errors}")
+        finally:
+            finished.set()
+            with lock:
+                for response in responses.values():
+                    response.close()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def get_image_models(self, timeout: Optional[float] = None) -> List[str]:
         """Retrieve the list of supported image generation models."""
         url = f"{self.base_url}/image/models"
-        response = requests.get(url, headers=self.headers)
-        if response.status_code != 200:
-            raise RuntimeError(f"Error fetching image models: {response.status_code} {response.text}")
-        result = response.json()
+        result = self._get_json(url, "image/models", "Error fetching image models", timeout)
         return result.get("data", {}).get("models", [])
 
-    def generate_image(self, prompt: str, model: str, output_file: Optional[str] = None) -> bytes:
+    def generate_image(
+        self,
+        prompt: str,
+        model: str,
+        output_file: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> bytes:
         """
         Generate an image via the image generation endpoint.
 
@@ -107,13 +426,14 @@ class LilypadClient:
             prompt: The image prompt (max 1000 characters)
             model: The model to use (e.g. "sdxl-turbo")
             output_file: Optional; if provided, writes the raw bytes to a file.
+            timeout: Total deadline in seconds (defaults to the client's timeout)
 
         Returns:
             The raw bytes of the generated image.
         """
         url = f"{self.base_url}/image/generate"
         payload = {"prompt": prompt, "model": model}
-        response = requests.post(url, headers=self.headers, json=payload)
+        response = self._request("POST", url, f"image:{model}", json=payload, deadline=self._deadline(timeout))
         if response.status_code != 200:
             raise RuntimeError(f"Image generation error: {response.status_code} {response.text}")
         image_bytes = response.content
@@ -122,20 +442,102 @@ class LilypadClient:
                 f.write(image_bytes)
         return image_bytes
 
-    def get_job_status(self, job_id: str) -> Dict[str, Any]:
+    def generate_images(
+        self,
+        prompts: List[str],
+        model: str,
+        out_dir: str,
+        max_concurrency: int = 8,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate images for many prompts concurrently.
+
+        Identical prompts are generated once and share the transport's
+        connection pool (32 connections by default). Each image is streamed to
+        out_dir under a name derived from (prompt, model), so rerunning the
+        same batch skips images that already exist on disk.
+
+        Args:
+            prompts: The image prompts (duplicates allowed)
+            model: The model to use (e.g. "sdxl-turbo")
+            out_dir: Directory to write images into
+            max_concurrency: Maximum number of requests in flight
+            timeout: Deadline in seconds for each image, including the download
+
+        Returns:
+            A dict with "paths" (one per input prompt, None on failure),
+            "generated", "skipped" and "failed" counts, "errors",
+            "elapsed_s" and "images_per_sec".
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        url = f"{self.base_url}/image/generate"
+
+        targets: Dict[str, str] = {}
+        for prompt in prompts:
+            if prompt not in targets:
+                digest = hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()[:32]
+                targets[prompt] = os.path.join(out_dir, f"{digest}.png")
+
+        pending = {p: path for p, path in targets.items() if not os.path.exists(path)}
+        skipped = len(targets) - len(pending)
+
+        def fetch(prompt: str, path: str):
+            payload = {"prompt": prompt, "model": model}
+            deadline = self._deadline(timeout)
+            with self._request("POST", url, f"image:{model}", json=payload, stream=True, deadline=deadline) as response:
+                if response.status_code != 200:
+                    raise RuntimeError(f"Image generation error: {response.status_code} {response.text}")
+                # Write to a temporary name so an interrupted download is never
+                # mistaken for a finished image on resume
+                partial_path = f"{path}.part"
+                what = f"downloading image for {prompt!r}"
+                try:
+                    with open(partial_path, "wb") as f, _watch_deadline(deadline, response, what):
+                        for block in response.iter_content(chunk_size=64 * 1024):
+                            deadline.check(what)
+                            f.write(block)
+                    os.replace(partial_path, path)
+                except BaseException:
+                    if os.path.exists(partial_path):
+                        os.remove(partial_path)
+                    raise
+
+        errors: Dict[str, str] = {}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            futures = {pool.submit(fetch, p, path): p for p, path in pending.items()}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[futures[future]] = str(e)
+                    logger.error(f"Image generation failed for {futures[future]!r}: {e}")
+        elapsed = time.perf_counter() - start
+
+        generated = len(pending) - len(errors)
+        return {
+            "paths": [None if p in errors else targets[p] for p in prompts],
+            "generated": generated,
+            "skipped": skipped,
+            "failed": len(errors),
+            "errors": errors,
+            "elapsed_s": elapsed,
+            "images_per_sec": generated / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def get_job_status(self, job_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Retrieve the status and details of a job using its ID.
 
         Args:
             job_id: The job identifier.
+            timeout: Total deadline in seconds, including retries
         """
         url = f"{self.base_url}/jobs/{job_id}"
-        response = requests.get(url, headers=self.headers)
-        if response.status_code != 200:
-            raise RuntimeError(f"Job status error: {response.status_code} {response.text}")
-        return response.json()
+        return self._get_json(url, "jobs", "Job status error", timeout)
 
-    def cowsay(self, message: str) -> Dict[str, Any]:
+    def cowsay(self, message: str, timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Start a new cowsay job with the given message.
 
@@ -144,17 +546,14 @@ class LilypadClient:
         """
         url = f"{self.base_url}/cowsay"
         payload = {"message": message}
-        response = requests.post(url, headers=self.headers, json=payload)
+        response = self._request("POST", url, "cowsay", json=payload, deadline=self._deadline(timeout))
         if response.status_code != 200:
             raise RuntimeError(f"Cowsay job error: {response.status_code} {response.text}")
         return response.json()
 
-    def get_cowsay_results(self, job_id: str) -> Dict[str, Any]:
+    def get_cowsay_results(self, job_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Retrieve the results of a cowsay job.
         """
         url = f"{self.base_url}/cowsay/{job_id}/results"
-        response = requests.get(url, headers=self.headers)
-        if response.status_code != 200:
-            raise RuntimeError(f"Cowsay results error: {response.status_code} {response.text}")
-        return response.json()
\ No newline at end of file
+        return self._get_json(url, "cowsay/results", "Cowsay results error", timeout)
\ No newline at end of file
@@ -0,0 +1,265 @@
+"""
+Compact typed objects for chat completion results.
+
+Each class uses __slots__ and interns the strings that repeat across
+results (ids, model names, roles, finish reasons), so holding many
+completions or streamed chunks costs far less than the equivalent nested
+dicts. All objects keep a read-only dict-style accessor (obj["choices"],
+obj.get("usage")) and to_dict() for code written against the plain dicts.
+Optional OpenAI fields (tool_calls, logprobs, system_fingerprint) are kept
+as-is; keys outside the chat completion format are dropped.
+
+When msgspec is installed (the "fast" extra) the classes are msgspec
+Structs and from_json decodes straight into them without building
+intermediate dicts. Otherwise they are plain __slots__ classes filled from
+json.loads output.
+"""
+import sys
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class _Record:
+    __slots__ = ()
+
+    @property
+    def _fields(self) -> Tuple[str, ...]:
+        # msgspec Structs name their fields here; the fallback uses __slots__
+        return getattr(type(self), "__struct_fields__", self.__slots__)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._fields
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self._fields else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return ((key, getattr(self, key)) for key in self._fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert back to the plain nested dict format"""
+        def convert(value):
+            if isinstance(value, _Record):
+                return value.to_dict()
+            if isinstance(value, tuple):
+                return [convert(v) for v in value]
+            return value
+        return {key: convert(getattr(self, key)) for key in self._fields}
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={getattr(self, key)!r}" for key in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+
+if msgspec is not None:
+    class Usage(msgspec.Struct, _Record, gc=False):
+        prompt_tokens: int = 0
+        completion_tokens: int = 0
+        total_tokens: int = 0
+
+    class Message(msgspec.Struct, _Record, gc=False):
+        """A chat message, or the delta of a streamed chunk"""
+        role: Optional[str] = None
+        content: Optional[str] = None
+        tool_calls: Optional[List[Dict[str, Any]]] = None
+
+        def __post_init__(self):
+            self.role = _intern(self.role)
+
+    class Choice(msgspec.Struct, _Record, gc=False):
+        index: int = 0
+        message: Message = msgspec.field(default_factory=Message)
+        finish_reason: Optional[str] = None
+        logprobs: Optional[Dict[str, Any]] = None
+
+        def __post_init__(self):
+            self.finish_reason = _intern(self.finish_reason)
+
+    class ChunkChoice(msgspec.Struct, _Record, gc=False):
+        index: int = 0
+        delta: Message = msgspec.field(default_factory=Message)
+        finish_reason: Optional[str] = None
+        logprobs: Optional[Dict[str, Any]] = None
+
+        def __post_init__(self):
+            self.finish_reason = _intern(self.finish_reason)
+
+    class _Completion:
+        __slots__ = ()
+
+        def __post_init__(self):
+            self.id = _intern(self.id)
+            self.object = _intern(self.object)
+            self.model = _intern(self.model)
+            self.system_fingerprint = _intern(self.system_fingerprint)
+
+        @classmethod
+        def from_dict(cls, data: Dict[str, Any]):
+            return msgspec.convert(data, cls)
+
+        @classmethod
+        def from_json(cls, raw: Union[bytes, str]):
+            return cls._decoder.decode(raw)
+
+    class ChatCompletion(msgspec.Struct, _Completion, _Record, gc=False):
+        id: str = ""
+        object: str = "chat.completion"
+        created: int = 0
+        model: str = ""
+        choices: Tuple[Choice, ...] = ()
+        usage: Optional[Usage] = None
+        system_fingerprint: Optional[str] = None
+
+    class ChatCompletionChunk(msgspec.Struct, _Completion, _Record, gc=False):
+        id: str = ""
+        object: str = "chat.completion.chunk"
+        created: int = 0
+        model: str = ""
+        choices: Tuple[ChunkChoice, ...] = ()
+        usage: Optional[Usage] = None
+        system_fingerprint: Optional[str] = None
+
+    ChatCompletion._decoder = msgspec.json.Decoder(ChatCompletion)
+    ChatCompletionChunk._decoder = msgspec.json.Decoder(ChatCompletionChunk)
+
+else:
+    class Usage(_Record):
+        __slots__ = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+        def __init__(self, prompt_tokens: int = 0, completion_tokens: int = 0, total_tokens: int = 0):
+            self.prompt_tokens = prompt_tokens
+            self.completion_tokens = completion_tokens
+            self.total_tokens = total_tokens
+
+        @classmethod
+        def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["Usage"]:
+            if not data:
+                return None
+            return cls(data.get("prompt_tokens", 0), data.get("completion_tokens", 0), data.get("total_tokens", 0))
+
+
+    class Message(_Record):
+        """A chat message, or the delta of a streamed chunk"""
+        __slots__ = ("role", "content", "tool_calls")
+
+        def __init__(self, role: Optional[str] = None, content: Optional[str] = None,
+                     tool_calls: Optional[List[Dict[str, Any]]] = None):
+            self.role = _intern(role)
+            self.content = content
+            self.tool_calls = tool_calls
+
+        @classmethod
+        def from_dict(cls, data: Optional[Dict[str, Any]]) -> "Message":
+            data = data or {}
+            return cls(data.get("role"), data.get("content"), data.get("tool_calls"))
+
+
+    class Choice(_Record):
+        __slots__ = ("index", "message", "finish_reason", "logprobs")
+
+        def __init__(self, index: int, message: Message, finish_reason: Optional[str] = None,
+                     logprobs: Optional[Dict[str, Any]] = None):
+            self.index = index
+            self.message = message
+            self.finish_reason = _intern(finish_reason)
+            self.logprobs = logprobs
+
+        @classmethod
+        def from_dict(cls, data: Dict[str, Any]) -> "Choice":
+            return cls(data.get("index", 0), Message.from_dict(data.get("message")), data.get("finish_reason"),
+                       data.get("logprobs"))
+
+
+    class ChunkChoice(_Record):
+        __slots__ = ("index", "delta", "finish_reason", "logprobs")
+
+        def __init__(self, index: int, delta: Message, finish_reason: Optional[str] = None,
+                     logprobs: Optional[Dict[str, Any]] = None):
+            self.index = index
+            self.delta = delta
+            self.finish_reason = _intern(finish_reason)
+            self.logprobs = logprobs
+
+        @classmethod
+        def from_dict(cls, data: Dict[str, Any]) -> "ChunkChoice":
+            return cls(data.get("index", 0), Message.from_dict(data.get("delta")), data.get("finish_reason"),
+                       data.get("logprobs"))
+
+
+    class ChatCompletion(_Record):
+        __slots__ = ("id", "object", "created", "model", "choices", "usage", "system_fingerprint")
+
+        def __init__(self, id: str, object: str, created: int, model: str,
+                     choices: Tuple[Choice, ...], usage: Optional[Usage] = None,
+                     system_fingerprint: Optional[str] = None):
+            self.id = _intern(id)
+            self.object = _intern(object)
+            self.created = created
+            self.model = _intern(model)
+            self.choices = choices
+            self.usage = usage
+            self.system_fingerprint = _intern(system_fingerprint)
+
+        @classmethod
+        def from_dict(cls, data: Dict[str, Any]) -> "ChatCompletion":
+            return cls(
+                data.get("id", ""),
+                data.get("object", "chat.completion"),
+                data.get("created", 0),
+                data.get("model", ""),
+                tuple(Choice.from_dict(c) for c in data.get("choices", ())),
+                Usage.from_dict(data.get("usage")),
+                data.get("system_fingerprint"),
+            )
+
+        @classmethod
+        def from_json(cls, raw: Union[bytes, str]) -> "ChatCompletion":
+            return cls.from_dict(json.loads(raw))
+
+
+    class ChatCompletionChunk(_Record):
+        __slots__ = ("id", "object", "created", "model", "choices", "usage", "system_fingerprint")
+
+        def __init__(self, id: str, object: str, created: int, model: str,
+                     choices: Tuple[ChunkChoice, ...], usage: Optional[Usage] = None,
+                     system_fingerprint: Optional[str] = None):
+            self.id = _intern(id)
+            self.object = _intern(object)
+            self.created = created
+            self.model = _intern(model)
+            self.choices = choices
+            self.usage = usage
+            self.system_fingerprint = _intern(system_fingerprint)
+
+        @classmethod
+        def from_dict(cls, data: Dict[str, Any]) -> "ChatCompletionChunk":
+            return cls(
+                data.get("id", ""),
+                data.get("object", "chat.completion.chunk"),
+                data.get("created", 0),
+                data.get("model", ""),
+                tuple(ChunkChoice.from_dict(c) for c in data.get("choices", ())),
+                Usage.from_dict(data.get("usage")),
+                data.get("system_fingerprint"),
+            )
+
+        @classmethod
+        def from_json(cls, raw: Union[bytes, str]) -> "ChatCompletionChunk":
+            return cls.from_dict(json.loads(raw))
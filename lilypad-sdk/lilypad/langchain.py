@@ -1,9 +1,16 @@
 
-from utils import SUPPORTED_MODELS
+from lilypad.utils import SUPPORTED_MODELS
 
+import json
+import time
+import asyncio
+import logging
 import pydantic
-from typing import Any, Optional, Union
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Union
 
+import httpx
 import pydantic
 from langchain_core.exceptions import OutputParserException
 from langchain_core.language_models.base import LanguageModelInput
@@ -15,8 +22,86 @@ from langchain_core.runnables.base import Runnable
 from langchain_core.runnables.config import RunnableConfig
 from langchain_openai import ChatOpenAI
 from lilypad.client import LilypadClient
+from lilypad.transport import Transport
 
+logger = logging.getLogger(__name__)
 
+# Hop-by-hop and body-length headers are recomputed by the inner transport
+_DROPPED_HEADERS = {"content-length", "host", "transfer-encoding", "connection"}
+# The inner transport has already decoded the body, which is re-framed line by line
+_DROPPED_RESPONSE_HEADERS = _DROPPED_HEADERS | {"content-encoding", "keep-alive"}
+
+
+class _TransportByteStream(httpx.SyncByteStream):
+    def __init__(self, response):
+        self._response = response
+
+    def __iter__(self):
+        # Line by line so recorded/replayed SSE timing is preserved
+        for line in self._response.iter_lines():
+            yield line + b"\n"
+
+    def close(self):
+        self._response.close()
+
+
+class LilypadHttpxTransport(httpx.BaseTransport):
+    """Routes ChatOpenAI's httpx traffic through a lilypad Transport"""
+
+    def __init__(self, transport: Transport):
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        body = json.loads(request.content) if request.content else None
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        # ChatOpenAI's request_timeout arrives as httpx's per-request timeout
+        timeout = request.extensions.get("timeout", {})
+        response = self.transport.request(
+            request.method, str(request.url), headers=headers, json=body, stream=True,
+            timeout=(timeout.get("connect"), timeout.get("read")),
+        )
+        response_headers = {
+            k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_RESPONSE_HEADERS
+        }
+        response_headers.setdefault("Content-Type", "application/json")
+        return httpx.Response(
+            response.status_code,
+            headers=response_headers,
+            stream=_TransportByteStream(response),
+        )
+
+
+class _AsyncTransportByteStream(httpx.AsyncByteStream):
+    def __init__(self, stream: _TransportByteStream):
+        self._iterator = iter(stream)
+        self._stream = stream
+
+    async def __aiter__(self):
+        while True:
+            line = await asyncio.to_thread(next, self._iterator, None)
+            if line is None:
+                return
+            yield line
+
+    async def aclose(self):
+        self._stream.close()
+
+
+class LilypadAsyncHttpxTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of LilypadHttpxTransport, running the transport in a thread"""
+
+    def __init__(self, transport: Transport):
+        self.sync_transport = LilypadHttpxTransport(transport)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        response = await asyncio.to_thread(self.sync_transport.handle_request, request)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_AsyncTransportByteStream(response.stream),
+        )
 
 
 class LilypadLLMWrapper(Runnable):
@@ -28,6 +113,10 @@ class LilypadLLMWrapper(Runnable):
         max_tokens: int = 8192,
         rate_limiter: Union[BaseRateLimiter, None] = None,
         api_key: str = "",
+        transport: Optional[Transport] = None,
+        race_models: Optional[List[str]] = None,
+        request_timeout: Optional[float] = 120.0,
+        max_retries: int = 2,
     ):
         self.provider = provider
         self.model = model
@@ -35,6 +124,9 @@ class LilypadLLMWrapper(Runnable):
         self.api_key = api_key
         self.max_tokens = max_tokens
         self.rate_limiter = rate_limiter
+        self.transport = transport
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
         self.parser = StrOutputParser()
         self.schema = None
 
@@ -45,16 +137,32 @@ class LilypadLLMWrapper(Runnable):
             "deepseek-r1:7b", "phi4:14b", "qwen2.5:7b", "qwen2.5-coder:7b"
         ]
         
-        if self.model not in self.supported_models:
-            raise ValueError(f"Unsupported Lilypad model: {self.model}")
+        for model in [self.model] + list(race_models or []):
+            if model not in self.supported_models:
+                raise ValueError(f"Unsupported Lilypad model: {model}")
+
+        self.llm = self._make_llm(self.model)
+
+        # Models raced against self.model on every invoke; the first
+        # successful response wins and the others are cancelled
+        self.race_llms = [(model, self._make_llm(model)) for model in race_models or []]
+        self.race_wins: Counter = Counter()
+        self.last_race_winner: Optional[str] = None
 
-        # Initialize ChatOpenAI with Lilypad configuration
-        self.llm = ChatOpenAI(
+    def _make_llm(self, model: str) -> ChatOpenAI:
+        """Initialize ChatOpenAI with Lilypad configuration"""
+        return ChatOpenAI(
             base_url="https://anura-testnet.lilypad.tech/api/v1",
             api_key=self.api_key,
-            model=self.model,
+            model=model,
             temperature=self.temperature,
             max_tokens=self.max_tokens,
+            timeout=self.request_timeout,
+            max_retries=self.max_retries,
+            http_client=httpx.Client(transport=LilypadHttpxTransport(self.transport)) if self.transport else None,
+            http_async_client=(
+                httpx.AsyncClient(transport=LilypadAsyncHttpxTransport(self.transport)) if self.transport else None
+            ),
             # model_kwargs={
             #     'headers': {
             #         'Authorization': f'Bearer {LILYPAD_API_KEY}',
@@ -63,7 +171,6 @@ class LilypadLLMWrapper(Runnable):
             # }
         )
 
-
     def coerce_to_schema(self, llm_output: str):
         """
         Coerce raw LLM output into a structured schema object.
@@ -86,6 +193,18 @@ class LilypadLLMWrapper(Runnable):
         return pydantic_object
 
     
+    def _prepare_prompt(self, input: LanguageModelInput) -> LanguageModelInput:
+        """
+        Apply provider-specific formatting shared by invoke and ainvoke.
+        """
+        # Example: for providers like Google, one might inject formatting instructions.
+        if self.provider == "google" and self.schema is not None:
+            format_instructions = self.parser.get_format_instructions()
+            messages = input.to_messages()
+            messages[0] = SystemMessage(content=f"{messages[0].content}\n{format_instructions}")
+            return ChatPromptValue(messages=messages)
+        return input
+
     def invoke(
         self,
         input: LanguageModelInput,
@@ -95,26 +214,90 @@ class LilypadLLMWrapper(Runnable):
         """
         Invoke the LLM with the given input and configuration.
         """
-        prompt = input
+        prompt = self._prepare_prompt(input)
 
-        # Example: for providers like Google, one might inject formatting instructions.
-        if self.provider == "google" and self.schema is not None:
-            format_instructions = self.parser.get_format_instructions()
-            messages = input.to_messages()
-            messages[0] = SystemMessage(content=f"{messages[0].content}\n{format_instructions}")
-            prompt = ChatPromptValue(messages=messages)
+        if self.race_llms:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(self._race(prompt, config))
+            # Called from async code (e.g. a notebook or a sync tool inside an
+            # agent): asyncio.run cannot nest, so race on a private loop
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                return pool.submit(asyncio.run, self._race(prompt, config)).result()
 
         try:
             return self.llm.invoke(input=prompt, config=config)
         except OutputParserException as ex:
             return self.coerce_to_schema(ex.llm_output)
 
+    async def ainvoke(
+        self,
+        input: LanguageModelInput,
+        config: Optional[RunnableConfig] = None,
+        **kwargs: Any,
+    ) -> BaseMessage:
+        """
+        Asynchronously invoke the LLM, racing the configured models if any.
+        """
+        prompt = self._prepare_prompt(input)
+
+        if self.race_llms:
+            return await self._race(prompt, config)
+
+        try:
+            return await self.llm.ainvoke(input=prompt, config=config)
+        except OutputParserException as ex:
+            return self.coerce_to_schema(ex.llm_output)
+
+    async def _race(self, prompt: LanguageModelInput, config: Optional[RunnableConfig]):
+        """
+        Send the prompt to self.model and every race model at once.
+
+        The first response that arrives without error wins. With structured
+        output, a response that fails to parse into the schema is not
+        acceptable, so the race continues with the remaining models.
+        """
+        start = time.perf_counter()
+        candidates = [(self.model, self.llm)] + self.race_llms
+        tasks = {
+            asyncio.create_task(llm.ainvoke(input=prompt, config=config)): model
+            for model, llm in candidates
+        }
+        errors = {}
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    model = tasks.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as ex:
+                        errors[model] = ex
+                        continue
+                    self.race_wins[model] += 1
+                    self.last_race_winner = model
+                    logger.info(
+                        f"Race won by {model} in {time.perf_counter() - start:.2f}s"
+                    )
+                    return result
+        finally:
+            # Cancelling a task closes its in-flight HTTP stream
+            for task in tasks:
+                task.cancel()
+
+        parse_errors = [ex for ex in errors.values() if isinstance(ex, OutputParserException)]
+        if parse_errors:
+            return self.coerce_to_schema(parse_errors[0].llm_output)
+        raise RuntimeError(f"All raced models failed: {errors}")
+
     def with_structured_output(self, schema: pydantic.BaseModel):
         """
         Configure the LLM wrapper to output structured data using a Pydantic schema.
         """
         if self.provider == "lilypad":
             self.llm = self.llm.with_structured_output(schema)
+            self.race_llms = [(model, llm.with_structured_output(schema)) for model, llm in self.race_llms]
         return self
 
 
@@ -137,7 +320,12 @@ def get_long_context_llm(rate_limiter: BaseRateLimiter | None = None):
     )
 
 def get_vision_llm(rate_limiter: BaseRateLimiter | None = None):
-    """Get a multimodal vision-language model"""
+    """
+    Get a multimodal vision-language model.
+
+    Build its input with lilypad.utils.images.build_vision_message, which
+    downscales images to the model's native resolution before encoding.
+    """
     return LilypadLLMWrapper(
         model="llava:7b",
         # model="gemma3:4b",
@@ -169,8 +357,8 @@ if __name__ == "__main__":
 
 
     # # For image understanding 
+    # from lilypad.utils.images import build_vision_message
     # vision_llm = get_vision_llm()
-    # description = vision_llm.invoke({
-    #     "text": "Describe this image",
-    #     "image": "<base64-encoded-image>"
-    # })
\ No newline at end of file
+    # description = vision_llm.invoke([
+    #     build_vision_message("Describe this image", "photo.jpg")
+    # ])
\ No newline at end of file
@@ -1,3 +1,23 @@
-from lilypad.module_builder.builder import LilypadModuleBuilder
-from lilypad.module_builder.publisher import ModulePublisher
-from lilypad.module_builder.config import ModuleConfig
\ No newline at end of file
+import importlib
+
+from lilypad.module_builder.config import ModuleConfig
+
+# The builder side needs docker and jinja2 (the "builder" extra). Generated
+# modules only import lilypad.module_builder.decorators inside their image,
+# so these are imported on first use rather than with the package.
+_LAZY = {
+    "LilypadModuleBuilder": "lilypad.module_builder.builder",
+    "ModulePublisher": "lilypad.module_builder.publisher",
+    "WarmTestHarness": "lilypad.module_builder.harness",
+    "ModuleProfiler": "lilypad.module_builder.profiler",
+    "ResourceSizer": "lilypad.module_builder.sizing",
+    "BuildOrchestrator": "lilypad.module_builder.orchestrator",
+}
+
+__all__ = ["ModuleConfig", *_LAZY]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,7 +2,7 @@ import os
 import json
 import docker
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from pydantic import BaseModel, Field
 from jinja2 import Environment, FileSystemLoader
 
@@ -76,13 +76,23 @@ class LilypadModuleBuilder:
         template = self.template_env.get_template('inference_script.j2')
         script_content = template.render({
             'model_name': self.config.model_name,
-            'gpu': self.config.gpu
+            'gpu': self.config.gpu,
+            'batch_size': self.config.batch_size,
+            'max_new_tokens': self.config.max_new_tokens,
+            'torch_dtype': self.config.torch_dtype,
+            # Rendered as Python literals (None, '8bit', 4)
+            'quantization': repr(self.config.quantization),
+            'num_threads': repr(self.config.num_threads)
         })
         (self.module_dir / 'src/run_inference.py').write_text(script_content)
         return self
     
-    def build_docker_image(self, tag: str, push: bool = False):
-        """Build and optionally push Docker image"""
+    def build_docker_image(self, tag: str, push: bool = False, log: Optional[Callable[[str], None]] = None):
+        """
+        Build and optionally push Docker image.
+
+        Build output lines go to stdout, or to `log` when given.
+        """
         client = docker.APIClient()
         build_args = {
             'MODEL_REPO': self.config.model_repo,
@@ -98,13 +108,25 @@ class LilypadModuleBuilder:
         )
         
         for line in stream:
-            print(line.decode('utf-8').strip())
+            (log or print)(line.decode('utf-8').strip())
             
         if push:
-            self.docker_client.images.push(tag)
+            self.push_docker_image(tag)
             
         return self
     
+    def push_docker_image(self, tag: str, progress: Optional[Callable[[Dict], None]] = None):
+        """Push Docker image, streaming per-layer progress events"""
+        client = docker.APIClient()
+        for event in client.push(tag, stream=True, decode=True):
+            if 'error' in event:
+                raise RuntimeError(f"Docker push failed: {event['error']}")
+            if progress:
+                progress(event)
+            elif 'status' in event:
+                print(f"{event.get('id', '')} {event['status']} {event.get('progress', '')}".strip())
+        return self
+    
     def validate_module(self):
         """Validate module structure"""
         required_files = [
@@ -1,5 +1,5 @@
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from pydantic import BaseModel, Field, model_validator
 
 class ModuleConfig(BaseModel):
     """Configuration model for Lilypad modules"""
@@ -24,4 +24,18 @@ class ModuleConfig(BaseModel):
     
     # Runtime configuration
     timeout: int = 600  # Seconds
-    concurrency: int = 1
\ No newline at end of file
+    concurrency: int = 1
+
+    # Inference configuration
+    batch_size: int = 8  # Max prompts per generate() call
+    max_new_tokens: int = 256
+    torch_dtype: Literal["auto", "float32", "float16", "bfloat16"] = "auto"
+    quantization: Optional[Literal["8bit", "4bit"]] = None  # Requires bitsandbytes
+    num_threads: Optional[int] = None  # torch intra-op threads, None = torch default
+
+    @model_validator(mode="after")
+    def check_quantization(self):
+        """bitsandbytes quantization only runs on CUDA, so it needs a GPU"""
+        if self.quantization and not self.gpu:
+            raise ValueError(f"quantization='{self.quantization}' requires gpu=True")
+        return self
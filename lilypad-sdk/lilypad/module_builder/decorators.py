@@ -1,7 +1,69 @@
 import os
 import json
+import hashlib
+
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Set
+
+from lilypad.utils.jsonl import truncate_partial_line
+
+
+def _env_inputs() -> List[str]:
+    """Read MODEL_INPUT as a JSON list or a single string"""
+    raw = os.getenv('MODEL_INPUT', '')
+    try:
+        parsed = json.loads(raw)
+    except ValueError:
+        parsed = raw
+    return parsed if isinstance(parsed, list) else [raw]
+
+
+def _iter_jsonl_records(input_dir: str, skip_ids: Set[str]) -> Iterator[Dict]:
+    """
+    Lazily yield {"id", "input"} records from every *.jsonl file in input_dir,
+    falling back to MODEL_INPUT when there are none. Records whose id is in
+    skip_ids are dropped.
+    """
+    files = sorted(Path(input_dir).glob('*.jsonl')) if os.path.isdir(input_dir) else []
+    if not files:
+        for i, text in enumerate(_env_inputs()):
+            # Content-derived ids, so a later run with a different MODEL_INPUT
+            # is not mistaken for a resume of this one
+            digest = hashlib.sha256(json.dumps(text).encode('utf-8')).hexdigest()[:16]
+            record_id = f'{i}:{digest}'
+            if record_id not in skip_ids:
+                yield {'id': record_id, 'input': text}
+        return
+
+    for path in files:
+        with open(path) as f:
+            for lineno, line in enumerate(f):
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if isinstance(item, dict):
+                    record_id = str(item.get('id', f'{path.name}:{lineno}'))
+                    text = item['input']
+                else:
+                    record_id, text = f'{path.name}:{lineno}', item
+                if record_id not in skip_ids:
+                    yield {'id': record_id, 'input': text}
+
+
+def _completed_ids(output_path: str) -> Set[str]:
+    """Collect ids already written to a JSONL output file by a previous run"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                done.add(str(json.loads(line)['id']))
+            except (ValueError, KeyError, TypeError):
+                # A partially written trailing line from an interrupted run
+                continue
+    return done
 
-from typing import Callable
 
 class ModuleDecorators:
     """Decorators for common module patterns"""
@@ -14,6 +76,35 @@ class ModuleDecorators:
             return fn(input_text, *args, **kwargs)
         return wrapper
     
+    @staticmethod
+    def jsonl_input(chunk_size: int = 32, input_dir: str = '/inputs',
+                    output_path: str = '/outputs/results.jsonl') -> Callable:
+        """
+        Decorator factory for streaming input handlers.
+
+        The handler receives an iterator of chunks, each a list of at most
+        chunk_size {"id", "input"} records read lazily from the *.jsonl files
+        in input_dir. Records already present in output_path are skipped so a
+        restarted job resumes where it stopped.
+        """
+        def decorator(fn):
+            def wrapper(*args, **kwargs):
+                records = _iter_jsonl_records(input_dir, _completed_ids(output_path))
+
+                def chunks():
+                    chunk = []
+                    for record in records:
+                        chunk.append(record)
+                        if len(chunk) >= chunk_size:
+                            yield chunk
+                            chunk = []
+                    if chunk:
+                        yield chunk
+
+                return fn(chunks(), *args, **kwargs)
+            return wrapper
+        return decorator
+    
     @staticmethod
     def json_output(fn):
         """Decorator for JSON output formatting"""
@@ -23,4 +114,29 @@ class ModuleDecorators:
             with open(output_path, 'w') as f:
                 json.dump(result, f)
             return output_path
-        return wrapper
\ No newline at end of file
+        return wrapper
+    
+    @staticmethod
+    def jsonl_output(flush_every: int = 16, output_path: str = '/outputs/results.jsonl') -> Callable:
+        """
+        Decorator factory for incremental JSONL output.
+
+        The handler returns an iterable (typically a generator) of result
+        dicts, each carrying the "id" of its input record. Results are
+        appended to output_path as they are produced and flushed to disk
+        after the first item and then every flush_every items, so an
+        interrupted job keeps its progress and the first result is visible
+        as soon as it exists.
+        """
+        def decorator(fn):
+            def wrapper(*args, **kwargs):
+                truncate_partial_line(output_path)
+                with open(output_path, 'a') as f:
+                    for count, result in enumerate(fn(*args, **kwargs), start=1):
+                        f.write(json.dumps(result) + '\n')
+                        if count == 1 or count % flush_every == 0:
+                            f.flush()
+                            os.fsync(f.fileno())
+                return output_path
+            return wrapper
+        return decorator
@@ -0,0 +1,183 @@
+import json
+import logging
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, Queue
+from typing import Any, Dict, List, Optional
+
+PROTOCOL_PREFIX = "__LILYPAD__ "
+
+# Runs inside the module container. Imports the inference script once (so the
+# model stays loaded), then serves one test case per stdin line. Replies are
+# tagged with PROTOCOL_PREFIX so they can be told apart from the script's own
+# prints.
+WARM_DRIVER = r'''
+import importlib.util, json, os, resource, sys, time
+
+def emit(message):
+    sys.__stdout__.write("__LILYPAD__ " + json.dumps(message) + "\n")
+    sys.__stdout__.flush()
+
+def read_result(path):
+    with open(path) as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("run_inference", "src/run_inference.py")
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+if hasattr(module, "load_model"):
+    module.load_model()
+os.makedirs("/outputs", exist_ok=True)
+emit({"ready": True, "load_s": time.perf_counter() - start})
+
+for line in sys.stdin:
+    case = json.loads(line)
+    saved_env = dict(os.environ)
+    os.environ.update(case["inputs"])
+    for name in ("results.jsonl", "results.json"):
+        if os.path.exists(os.path.join("/outputs", name)):
+            os.remove(os.path.join("/outputs", name))
+    started = time.perf_counter()
+    try:
+        result, error = read_result(module.main()), None
+    except Exception as e:
+        result, error = None, repr(e)
+    latency = time.perf_counter() - started
+    os.environ.clear()
+    os.environ.update(saved_env)
+    emit({
+        "id": case["id"],
+        "result": result,
+        "error": error,
+        "latency_s": latency,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+'''
+
+
+class WarmContainer:
+    """A module container kept running between test cases"""
+
+    def __init__(self, image: str, gpu: bool = False):
+        self.image = image
+        self.gpu = gpu
+        self.process: Optional[subprocess.Popen] = None
+        self.cold_start_s: Optional[float] = None
+        self.load_s: Optional[float] = None
+
+    def start(self):
+        """Start the container and block until the model is loaded"""
+        cmd = ["docker", "run", "-i", "--rm", "--entrypoint", "python"]
+        if self.gpu:
+            cmd += ["--gpus", "all"]
+        cmd += [self.image, "-c", WARM_DRIVER]
+
+        started = time.perf_counter()
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        ready = self._read_message()
+        self.cold_start_s = time.perf_counter() - started
+        self.load_s = ready.get("load_s")
+        return self
+
+    def run_case(self, case_id: int, inputs: Dict[str, str]) -> Dict[str, Any]:
+        """Send one case to the warm container and wait for its reply"""
+        self.process.stdin.write(json.dumps({"id": case_id, "inputs": inputs}) + "\n")
+        self.process.stdin.flush()
+        return self._read_message()
+
+    def stop(self):
+        if self.process is None:
+            return
+        self.process.stdin.close()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.process = None
+
+    def _read_message(self) -> Dict[str, Any]:
+        for line in self.process.stdout:
+            if line.startswith(PROTOCOL_PREFIX):
+                return json.loads(line[len(PROTOCOL_PREFIX):])
+        raise RuntimeError(f"Container for {self.image} exited with code {self.process.wait()}")
+
+
+class WarmTestHarness:
+    """Runs a matrix of test inputs against warm module containers"""
+
+    def __init__(self, image: str, workers: int = 1, gpu: bool = False):
+        self.image = image
+        self.workers = workers
+        self.gpu = gpu
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, cases: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Run every case (a dict of env vars, e.g. {"MODEL_INPUT": "..."}).
+
+        Starts `workers` containers in parallel, pays the cold start once per
+        container and spreads the cases across them.
+
+        Returns:
+            A report with per-container cold start / model load times and
+            per-case result, latency and peak RSS, in input order. Peak RSS
+            comes from the container process's ru_maxrss, so each case's
+            value is the running maximum of its container so far, not the
+            memory used by that case alone.
+        """
+        containers = [WarmContainer(self.image, gpu=self.gpu) for _ in range(self.workers)]
+
+        pending: Queue = Queue()
+        for case_id, inputs in enumerate(cases):
+            pending.put((case_id, inputs))
+        results: List[Optional[Dict[str, Any]]] = [None] * len(cases)
+        lock = threading.Lock()
+
+        def drain(container: WarmContainer, worker_id: int):
+            while True:
+                try:
+                    case_id, inputs = pending.get_nowait()
+                except Empty:
+                    return
+                reply = container.run_case(case_id, inputs)
+                reply.update({"inputs": inputs, "worker": worker_id})
+                if reply["error"]:
+                    self.logger.error(f"Test case {case_id} failed: {reply['error']}")
+                with lock:
+                    results[case_id] = reply
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                list(pool.map(lambda c: c.start(), containers))
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(drain, c, i) for i, c in enumerate(containers)]
+                for future in futures:
+                    future.result()
+        finally:
+            for container in containers:
+                container.stop()
+
+        latencies = [r["latency_s"] for r in results if r is not None]
+        return {
+            "image": self.image,
+            "workers": [
+                {"cold_start_s": c.cold_start_s, "model_load_s": c.load_s} for c in containers
+            ],
+            "cases": results,
+            "total_cases": len(cases),
+            "failed_cases": sum(1 for r in results if r is None or r["error"]),
+            "mean_latency_s": sum(latencies) / len(latencies) if latencies else None,
+            "peak_rss_mb": max((r["peak_rss_mb"] for r in results if r), default=None),
+            "peak_rss_note": "running maximum per container process (ru_maxrss), not per case",
+        }
@@ -0,0 +1,233 @@
+import io
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+import docker
+
+from lilypad.module_builder.builder import LilypadModuleBuilder
+from lilypad.module_builder.config import ModuleConfig
+
+
+class BuildOrchestrator:
+    """
+    Builds many modules in parallel, sharing Docker layer cache.
+
+    Caching happens at two levels. First, every distinct Dockerfile prefix
+    (the base image, platform and GPU setup layers before the first COPY)
+    is built once on its own, so modules that share a base but not their
+    requirements still reuse those layers. Then modules with the same prefix
+    and requirements.txt are grouped: one module per group is built to
+    populate the cache for the dependency layers, and the rest of the group
+    is built in parallel on top of it. Each build log is written to its own
+    file instead of stdout.
+
+    Modules must already be scaffolded (Dockerfile, requirements.txt, ...).
+    """
+
+    def __init__(
+        self,
+        configs: List[ModuleConfig],
+        max_parallel: int = 4,
+        log_dir: str = "build_logs",
+        tags: Optional[Dict[str, str]] = None,
+    ):
+        self.builders = [LilypadModuleBuilder(config) for config in configs]
+        self.max_parallel = max_parallel
+        self.log_dir = Path(log_dir)
+        self.tags = tags or {}
+        self.logger = logging.getLogger(__name__)
+
+    def tag_for(self, builder: LilypadModuleBuilder) -> str:
+        return self.tags.get(builder.config.module_name, f"{builder.config.module_name}:latest")
+
+    @staticmethod
+    def dockerfile_prefix(dockerfile: str) -> str:
+        """The instructions before the first COPY/ADD, which need no build context"""
+        lines = []
+        for line in dockerfile.splitlines():
+            instruction = line.strip().split(" ", 1)[0].upper()
+            if instruction in ("COPY", "ADD"):
+                break
+            lines.append(line)
+        has_from = any(line.strip().upper().startswith("FROM ") for line in lines)
+        return "\n".join(lines).strip() + "\n" if has_from else ""
+
+    def prefix_for(self, builder: LilypadModuleBuilder) -> str:
+        dockerfile = builder.module_dir / 'Dockerfile'
+        return self.dockerfile_prefix(dockerfile.read_text()) if dockerfile.exists() else ""
+
+    @staticmethod
+    def prefix_key(prefix: str, platform: str) -> str:
+        return hashlib.sha256(json.dumps([prefix, platform]).encode()).hexdigest()[:12]
+
+    @staticmethod
+    def layer_key(builder: LilypadModuleBuilder) -> str:
+        """Identifies the shared prefix of layers a module's image starts with"""
+        requirements = builder.module_dir / 'requirements.txt'
+        deps = requirements.read_text() if requirements.exists() else ""
+        normalized = "\n".join(sorted(line.strip() for line in deps.splitlines() if line.strip()))
+        config = builder.config
+        raw = json.dumps([config.base_image, config.platform, config.gpu, normalized])
+        return hashlib.sha256(raw.encode()).hexdigest()[:12]
+
+    def group_builders(self) -> List[List[LilypadModuleBuilder]]:
+        groups: Dict[str, List[LilypadModuleBuilder]] = {}
+        for builder in self.builders:
+            groups.setdefault(self.layer_key(builder), []).append(builder)
+        return list(groups.values())
+
+    @staticmethod
+    def _build_logger(log_file, counts: Dict[str, int], errors: List[str]) -> Callable[[str], None]:
+        """Parse Docker's JSON build stream into a log file, counting steps and cache hits"""
+        def log(raw: str):
+            for line in raw.splitlines():
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    log_file.write(line + "\n")
+                    continue
+                if "error" in event:
+                    errors.append(event["error"])
+                    log_file.write(f"ERROR: {event['error']}\n")
+                text = event.get("stream", "")
+                if text.startswith("Step "):
+                    counts["steps"] += 1
+                elif "Using cache" in text:
+                    counts["cached"] += 1
+                log_file.write(text)
+        return log
+
+    def _warm_prefix(self, key: str, prefix: str, platform: str) -> Dict[str, Any]:
+        """Build a Dockerfile prefix on its own so its layers are cached for every module using it"""
+        tag = f"lilypad-prefix:{key}"
+        log_path = self.log_dir / f"_prefix-{key}.log"
+        counts = {"steps": 0, "cached": 0}
+        errors: List[str] = []
+
+        with open(log_path, "w") as log_file:
+            log = self._build_logger(log_file, counts, errors)
+            start = time.perf_counter()
+            try:
+                stream = docker.APIClient().build(
+                    fileobj=io.BytesIO(prefix.encode("utf-8")), tag=tag, platform=platform, rm=True
+                )
+                for line in stream:
+                    log(line.decode("utf-8").strip())
+            except Exception as e:
+                errors.append(str(e))
+                log_file.write(f"ERROR: {e}\n")
+            duration = time.perf_counter() - start
+
+        status = "failed" if errors else "built"
+        self.logger.info(f"prefix {key}: {status} in {duration:.1f}s ({counts['cached']}/{counts['steps']} steps cached)")
+        return {
+            "prefix": key,
+            "tag": tag,
+            "status": status,
+            "duration_s": duration,
+            "steps": counts["steps"],
+            "cached_steps": counts["cached"],
+            "log": str(log_path),
+            "errors": errors,
+        }
+
+    def _build_one(self, builder: LilypadModuleBuilder, group: str) -> Dict[str, Any]:
+        name = builder.config.module_name
+        log_path = self.log_dir / f"{name}.log"
+        counts = {"steps": 0, "cached": 0}
+        errors: List[str] = []
+
+        with open(log_path, "w") as log_file:
+            log = self._build_logger(log_file, counts, errors)
+            start = time.perf_counter()
+            try:
+                builder.validate_module()
+                builder.build_docker_image(self.tag_for(builder), log=log)
+            except Exception as e:
+                errors.append(str(e))
+                log_file.write(f"ERROR: {e}\n")
+            duration = time.perf_counter() - start
+
+        status = "failed" if errors else "built"
+        self.logger.info(f"{name}: {status} in {duration:.1f}s ({counts['cached']}/{counts['steps']} steps cached)")
+        return {
+            "module": name,
+            "tag": self.tag_for(builder),
+            "layer_group": group,
+            "status": status,
+            "duration_s": duration,
+            "steps": counts["steps"],
+            "cached_steps": counts["cached"],
+            "cache_hit_rate": counts["cached"] / counts["steps"] if counts["steps"] else 0.0,
+            "log": str(log_path),
+            "errors": errors,
+        }
+
+    def build_all(self) -> Dict[str, Any]:
+        """
+        Build every module and return a summary with per-module duration,
+        status and cache hit rate, the prefix warm-up builds, plus overall
+        totals.
+        """
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        groups = self.group_builders()
+        # Requirement groups that share a Dockerfile prefix wait for it to be warmed
+        by_prefix: Dict[str, List[List[LilypadModuleBuilder]]] = {}
+        prefixes: Dict[str, tuple] = {}
+        for group in groups:
+            prefix = self.prefix_for(group[0])
+            key = self.prefix_key(prefix, group[0].config.platform) if prefix else ""
+            by_prefix.setdefault(key, []).append(group)
+            if prefix:
+                prefixes[key] = (prefix, group[0].config.platform)
+
+        results: List[Dict[str, Any]] = []
+        prefix_results: List[Dict[str, Any]] = []
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+            pending: Dict[Any, tuple] = {}
+
+            def submit_leaders(key: str):
+                for group in by_prefix.pop(key, []):
+                    future = pool.submit(self._build_one, group[0], self.layer_key(group[0]))
+                    pending[future] = ("leader", group)
+
+            for key, (prefix, platform) in prefixes.items():
+                pending[pool.submit(self._warm_prefix, key, prefix, platform)] = ("prefix", key)
+            # Modules without a readable Dockerfile have no prefix to warm
+            submit_leaders("")
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, payload = pending.pop(future)
+                    if kind == "prefix":
+                        # A failed warm-up only loses caching; the module builds report their own errors
+                        prefix_results.append(future.result())
+                        submit_leaders(payload)
+                    elif kind == "leader":
+                        results.append(future.result())
+                        # Start the group's remaining modules once its dependency layers exist
+                        for builder in payload[1:]:
+                            pending[pool.submit(self._build_one, builder, self.layer_key(builder))] = ("module", None)
+                    else:
+                        results.append(future.result())
+
+        steps = sum(r["steps"] for r in results)
+        cached = sum(r["cached_steps"] for r in results)
+        return {
+            "modules": sorted(results, key=lambda r: r["module"]),
+            "prefixes": sorted(prefix_results, key=lambda r: r["prefix"]),
+            "layer_groups": len(groups),
+            "built": sum(1 for r in results if r["status"] == "built"),
+            "failed": sum(1 for r in results if r["status"] == "failed"),
+            "wall_time_s": time.perf_counter() - start,
+            "total_build_time_s": sum(r["duration_s"] for r in results + prefix_results),
+            "cache_hit_rate": cached / steps if steps else 0.0,
+        }
@@ -0,0 +1,229 @@
+import json
+import time
+import shlex
+import tempfile
+import threading
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import docker
+
+from lilypad.module_builder.builder import LilypadModuleBuilder
+from lilypad.module_builder.config import ModuleConfig
+
+
+# Appended to the module's command so the container reports its own cgroup
+# accounting before exiting: the kernel-tracked memory high-water mark
+# (memory.peak on cgroup v2, max_usage_in_bytes on v1) and total CPU time.
+CGROUP_REPORT = (
+    "status=$?; "
+    "cat /sys/fs/cgroup/memory.peak > /outputs/.memory_peak 2>/dev/null"
+    " || cat /sys/fs/cgroup/memory/memory.max_usage_in_bytes > /outputs/.memory_peak 2>/dev/null; "
+    "awk '/^usage_usec/ {print $2 / 1000000}' /sys/fs/cgroup/cpu.stat > /outputs/.cpu_seconds 2>/dev/null"
+    " || awk '{print $1 / 1000000000}' /sys/fs/cgroup/cpuacct/cpuacct.usage > /outputs/.cpu_seconds 2>/dev/null; "
+    "exit $status"
+)
+
+
+def _read_number(path: Path) -> Optional[float]:
+    try:
+        return float(path.read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+class ContainerStatsSampler:
+    """Samples a running container's memory and CPU usage in a background thread"""
+
+    def __init__(self, container):
+        self.container = container
+        self.peak_memory_mb = 0.0
+        self.peak_cpu_percent = 0.0
+        self.cpu_samples: List[float] = []
+        self.memory_samples = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def join(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            for stats in self.container.stats(stream=True, decode=True):
+                self._record(stats)
+        except docker.errors.APIError:
+            # The container went away between samples
+            pass
+
+    def _record(self, stats: Dict[str, Any]):
+        memory = stats.get("memory_stats", {})
+        # max_usage is only reported on cgroup v1; fall back to current usage
+        usage = memory.get("max_usage") or memory.get("usage") or 0
+        if usage:
+            self.memory_samples += 1
+        self.peak_memory_mb = max(self.peak_memory_mb, usage / (1024 * 1024))
+
+        cpu, precpu = stats.get("cpu_stats", {}), stats.get("precpu_stats", {})
+        cpu_delta = cpu.get("cpu_usage", {}).get("total_usage", 0) - \
+            precpu.get("cpu_usage", {}).get("total_usage", 0)
+        system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+        if cpu_delta > 0 and system_delta > 0:
+            percent = cpu_delta / system_delta * cpu.get("online_cpus", 1) * 100
+            self.cpu_samples.append(percent)
+            self.peak_cpu_percent = max(self.peak_cpu_percent, percent)
+
+
+class ModuleProfiler:
+    """Profiles the image footprint and cold start of a built module"""
+
+    def __init__(self, builder):
+        self.builder = builder
+        self.docker_client = docker.from_env()
+
+    def layer_breakdown(self, tag: str) -> List[Dict[str, Any]]:
+        """Per-layer sizes of the image, largest first"""
+        history = self.docker_client.images.get(tag).history()
+        layers = [
+            {
+                "created_by": layer.get("CreatedBy", ""),
+                "size_mb": layer.get("Size", 0) / (1024 * 1024),
+            }
+            for layer in history
+        ]
+        return sorted(layers, key=lambda layer: layer["size_mb"], reverse=True)
+
+    def run_profiled(self, tag: str, inputs: Dict[str, str], poll_interval: float = 0.05) -> Dict[str, Any]:
+        """
+        Run the module once on the given env inputs while sampling resources.
+
+        Measures wall time from container start to the first result line on
+        disk and to exit, and reads the load/inference split and in-process
+        time to first output the generated script writes to
+        /outputs/timings.json.
+
+        Peak memory and CPU time come from the container's own cgroup
+        counters, read as the module exits. Peak memory falls back to the
+        largest `docker stats` sample when the cgroup file is unavailable
+        (and is None when there were no samples either).
+        """
+        config = self.docker_client.images.get(tag).attrs["Config"]
+        module_cmd = shlex.join((config.get("Entrypoint") or []) + (config.get("Cmd") or []))
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            output_path = Path(output_dir)
+            run_kwargs = {
+                "entrypoint": ["sh", "-c"],
+                "command": [f"{module_cmd}; {CGROUP_REPORT}"],
+                "environment": inputs,
+                "volumes": {output_dir: {"bind": "/outputs", "mode": "rw"}},
+                "detach": True,
+            }
+            if self.builder.config.gpu:
+                run_kwargs["device_requests"] = [
+                    docker.types.DeviceRequest(count=-1, capabilities=[["gpu"]])
+                ]
+
+            started = time.perf_counter()
+            container = self.docker_client.containers.run(tag, **run_kwargs)
+            sampler = ContainerStatsSampler(container).start()
+
+            first_output_s = None
+            try:
+                while True:
+                    container.reload()
+                    if first_output_s is None and any(
+                        p.stat().st_size > 0 for p in output_path.glob("results.json*")
+                    ):
+                        first_output_s = time.perf_counter() - started
+                    if container.status == "exited":
+                        break
+                    time.sleep(poll_interval)
+                total_s = time.perf_counter() - started
+                exit_code = container.wait()["StatusCode"]
+            finally:
+                sampler.join(timeout=5)
+                container.remove(force=True)
+
+            timings_file = output_path / "timings.json"
+            script_timings = json.loads(timings_file.read_text()) if timings_file.exists() else {}
+            cgroup_peak = _read_number(output_path / ".memory_peak")
+            cpu_seconds = _read_number(output_path / ".cpu_seconds")
+
+        if cgroup_peak:
+            peak_memory_mb, memory_source = cgroup_peak / (1024 * 1024), "cgroup"
+        elif sampler.memory_samples:
+            peak_memory_mb, memory_source = sampler.peak_memory_mb, "sampled"
+        else:
+            peak_memory_mb, memory_source = None, None
+
+        return {
+            "exit_code": exit_code,
+            # Wall time from `docker run` until the first result reached disk
+            "time_to_first_output_s": first_output_s,
+            # Measured by the script itself, from process start to first result
+            "script_first_output_s": script_timings.get("first_output_s"),
+            "total_s": total_s,
+            "model_load_s": script_timings.get("model_load_s"),
+            "inference_s": script_timings.get("inference_s"),
+            "peak_memory_mb": peak_memory_mb,
+            "peak_memory_source": memory_source,
+            "cpu_seconds": cpu_seconds,
+            "peak_cpu_percent": sampler.peak_cpu_percent if sampler.cpu_samples else None,
+            "mean_cpu_percent": (
+                sum(sampler.cpu_samples) / len(sampler.cpu_samples) if sampler.cpu_samples else None
+            ),
+        }
+
+    def profile(self, tag: str, inputs: Dict[str, str], output_file: Optional[str] = None,
+                build: bool = True) -> Dict[str, Any]:
+        """
+        Build the image (unless build=False), then report its footprint and a
+        profiled run as JSON, optionally written to output_file.
+        """
+        build_s = None
+        if build:
+            build_start = time.perf_counter()
+            self.builder.build_docker_image(tag)
+            build_s = time.perf_counter() - build_start
+
+        image = self.docker_client.images.get(tag)
+        report = {
+            "module_name": self.builder.config.module_name,
+            "module_version": self.builder.config.module_version,
+            "tag": tag,
+            "base_image": self.builder.config.base_image,
+            "build_s": build_s,
+            "image_size_mb": image.attrs.get("Size", 0) / (1024 * 1024),
+            "layers": self.layer_breakdown(tag),
+            "run": self.run_profiled(tag, inputs),
+        }
+
+        if output_file:
+            Path(output_file).write_text(json.dumps(report, indent=2))
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile a Lilypad module image")
+    parser.add_argument("config", help="Path to a ModuleConfig JSON file")
+    parser.add_argument("--tag", help="Image tag (default: <module_name>:latest)")
+    parser.add_argument("--input", default="", help="MODEL_INPUT for the profiled run")
+    parser.add_argument("--output", default="profile.json", help="Where to write the JSON report")
+    parser.add_argument("--no-build", action="store_true", help="Profile an existing image")
+    args = parser.parse_args()
+
+    config = ModuleConfig.model_validate_json(Path(args.config).read_text())
+    builder = LilypadModuleBuilder(config)
+    tag = args.tag or f"{config.module_name}:latest"
+    report = ModuleProfiler(builder).profile(
+        tag, {"MODEL_INPUT": args.input}, output_file=args.output, build=not args.no_build
+    )
+    print(json.dumps({k: v for k, v in report.items() if k != "layers"}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,73 @@
 # publisher.py
 
 import subprocess
+import hashlib
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Union
 import json
 import logging
 
+from lilypad.module_builder.harness import WarmTestHarness
+
+# Directories created inside the module dir by local tooling, not published
+EXCLUDED_FROM_HASH = {"test_outputs", "__pycache__"}
+# Hashed by size and mtime rather than content
+MODELS_DIR = "models"
+
+
 class ModulePublisher:
     """Handles publishing and testing Lilypad modules"""
     
     def __init__(self, builder):
         self.builder = builder
         self.logger = logging.getLogger(__name__)
+        self.cid_cache_file = self.builder.module_dir.parent / ".cid_cache.json"
+        self.last_deploy_timings: Dict[str, float] = {}
         
-    def publish_to_ipfs(self) -> str:
-        """Publish module to IPFS and return CID"""
+    def module_hash(self) -> str:
+        """
+        Hash of the module directory, used to key the CID cache.
+
+        Source files are hashed by content. Model weights under models/ can
+        be many GB, so they are keyed on size and modification time instead.
+        """
+        digest = hashlib.sha256()
+        for path in sorted(self.builder.module_dir.rglob("*")):
+            relative = path.relative_to(self.builder.module_dir)
+            if not path.is_file() or EXCLUDED_FROM_HASH.intersection(relative.parts):
+                continue
+            digest.update(str(relative).encode())
+            if relative.parts[0] == MODELS_DIR:
+                stat = path.stat()
+                digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+                continue
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        return digest.hexdigest()
+    
+    def _load_cid_cache(self) -> Dict[str, Dict[str, str]]:
+        if self.cid_cache_file.exists():
+            return json.loads(self.cid_cache_file.read_text())
+        return {}
+    
+    def publish_to_ipfs(self, use_cache: bool = True) -> str:
+        """
+        Publish module to IPFS and return CID.
+
+        The CID is cached against the module directory's content hash, so an
+        unchanged module is not published again.
+        """
+        module_name = self.builder.config.module_name
+        module_hash = self.module_hash()
+        cache = self._load_cid_cache()
+        cached = cache.get(module_name)
+        if use_cache and cached and cached["hash"] == module_hash:
+            self.logger.info(f"Module directory unchanged, reusing CID {cached['cid']}")
+            return cached["cid"]
+
         try:
             result = subprocess.run(
                 ["lilypad", "publish", str(self.builder.module_dir)],
@@ -22,19 +75,26 @@ class ModulePublisher:
                 text=True,
                 check=True
             )
-            return result.stdout.strip()
         except subprocess.CalledProcessError as e:
             self.logger.error(f"IPFS publish failed: {e.stderr}")
             raise
 
-    def run_local_test(self, inputs: Dict[str, str]) -> Dict[str, Any]:
+        cid = result.stdout.strip()
+        cache[module_name] = {"hash": module_hash, "cid": cid}
+        self.cid_cache_file.write_text(json.dumps(cache, indent=2))
+        return cid
+
+    def run_local_test(self, inputs: Dict[str, str]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
         """Run local test of the module"""
         test_output_dir = self.builder.module_dir / "test_outputs"
         test_output_dir.mkdir(exist_ok=True)
+        # Each test is a fresh job; stale results would otherwise be resumed
+        for stale in ("results.jsonl", "results.json"):
+            (test_output_dir / stale).unlink(missing_ok=True)
 
-        env_vars = [
-            f"-e {k}={v}" for k, v in inputs.items()
-        ]
+        env_vars = []
+        for k, v in inputs.items():
+            env_vars += ["-e", f"{k}={v}"]
         
         cmd = [
             "docker", "run", "--rm",
@@ -45,36 +105,83 @@ class ModulePublisher:
         
         try:
             subprocess.run(cmd, check=True)
+            jsonl_results = test_output_dir / "results.jsonl"
+            if jsonl_results.exists():
+                with open(jsonl_results) as f:
+                    return [json.loads(line) for line in f if line.strip()]
             with open(test_output_dir / "results.json") as f:
                 return json.load(f)
         except Exception as e:
             self.logger.error(f"Local test failed: {str(e)}")
             raise
 
-    def deploy_to_lilypad(self, network: str = "testnet"):
-        """Deploy module to Lilypad network"""
+    def run_test_matrix(self, cases: List[Dict[str, str]], workers: int = 1) -> Dict[str, Any]:
+        """
+        Run many test cases against warm containers of the module image.
+
+        Unlike run_local_test, each container is started (and the model
+        loaded) once, then reused for every case it is handed.
+        """
+        harness = WarmTestHarness(
+            f"{self.builder.config.module_name}:latest",
+            workers=workers,
+            gpu=self.builder.config.gpu
+        )
+        return harness.run(cases)
+
+    def deploy_to_lilypad(self, network: str = "testnet", use_cache: bool = True):
+        """
+        Deploy module to Lilypad network.
+
+        IPFS publishing only needs the module directory, so it runs alongside
+        the image build and push. Registration waits for both.
+        """
         if not self.builder.validate_module():
             raise ValueError("Module validation failed")
-            
+
+        tag = f"{self.builder.config.module_name}:latest"
+        timings: Dict[str, float] = {}
+        deploy_start = time.perf_counter()
+
+        def timed(stage, fn, *args, **kwargs):
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            timings[stage] = time.perf_counter() - start
+            return result
+
+        def build_and_push():
+            timed("build", self.builder.build_docker_image, tag)
+            timed("push", self.builder.push_docker_image, tag)
+
         print(f"Deploying {self.builder.config.module_name} to {network}:")
-        print("1. Building and pushing Docker image...")
-        self.builder.build_docker_image(
-            f"{self.builder.config.module_name}:latest",
-            push=True
-        )
-        
-        print("2. Publishing to IPFS...")
-        cid = self.publish_to_ipfs()
+        print("1. Building and pushing Docker image, publishing to IPFS...")
+        pool = ThreadPoolExecutor(max_workers=2)
+        try:
+            image_future = pool.submit(build_and_push)
+            cid_future = pool.submit(timed, "ipfs_publish", self.publish_to_ipfs, use_cache)
+            # Report whichever stage fails first without waiting for the other
+            done, _ = wait([image_future, cid_future], return_when=FIRST_EXCEPTION)
+            for future in done:
+                future.result()
+            cid = cid_future.result()
+            image_future.result()
+        finally:
+            # A stage still running after the other failed is left to finish in the background
+            pool.shutdown(wait=False)
         
-        print("3. Registering on Lilypad...")
+        print("2. Registering on Lilypad...")
         try:
-            subprocess.run([
+            timed("register", subprocess.run, [
                 "lilypad", "register-module",
                 "--cid", cid,
                 "--network", network
             ], check=True)
-            print(f"Successfully deployed module CID: {cid}")
-            return cid
         except subprocess.CalledProcessError as e:
             self.logger.error(f"Registration failed: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+        timings["total"] = time.perf_counter() - deploy_start
+        self.last_deploy_timings = timings
+        print("Stage timings: " + ", ".join(f"{k}={v:.1f}s" for k, v in timings.items()))
+        print(f"Successfully deployed module CID: {cid}")
+        return cid
@@ -0,0 +1,113 @@
+import math
+import logging
+from typing import Any, Dict, List, Optional
+
+from lilypad.module_builder.profiler import ModuleProfiler
+
+RAM_STEP_MB = 256
+CPU_STEP_MILLICORES = 250
+
+
+def _round_up(value: float, step: int) -> int:
+    return max(step, int(math.ceil(value / step)) * step)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(math.ceil(pct / 100 * len(ordered))) - 1)
+    return ordered[max(index, 0)]
+
+
+class ResourceSizer:
+    """
+    Sizes a module's manifest from measured usage.
+
+    Runs the module image on representative inputs, reads peak memory and
+    CPU from the container's cgroup accounting, and turns them into min_ram /
+    min_cpu values with headroom, rounded up to schedulable steps.
+    """
+
+    def __init__(self, builder, memory_headroom: float = 1.25, cpu_headroom: float = 1.2):
+        self.builder = builder
+        self.memory_headroom = memory_headroom
+        self.cpu_headroom = cpu_headroom
+        self.profiler = ModuleProfiler(builder)
+        self.logger = logging.getLogger(__name__)
+
+    def measure(self, tag: str, cases: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Run every case (a dict of env vars) once and collect its resource profile"""
+        runs = []
+        for inputs in cases:
+            run = self.profiler.run_profiled(tag, inputs)
+            if run["exit_code"] != 0:
+                # 137 is the usual sign the container was OOM killed
+                raise RuntimeError(
+                    f"Module exited with code {run['exit_code']} on {inputs}; "
+                    f"peak memory was {run['peak_memory_mb'] or 0:.0f} MB"
+                )
+            runs.append(run)
+        return runs
+
+    @staticmethod
+    def _run_cpu_percent(run: Dict[str, Any]) -> float:
+        """
+        The CPU demand of one run: its sampled peak, but never less than the
+        cgroup's average over the whole run (samples can miss short runs)
+        """
+        measurements = [run.get("peak_cpu_percent")]
+        if run.get("cpu_seconds") is not None and run.get("total_s"):
+            measurements.append(run["cpu_seconds"] / run["total_s"] * 100)
+        measurements = [m for m in measurements if m is not None]
+        if not measurements:
+            raise RuntimeError("No CPU measurement for a run; cannot size min_cpu safely")
+        return max(measurements)
+
+    def recommend(self, runs: List[Dict[str, Any]], node_cpu: Optional[int] = None,
+                  node_ram: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Derive manifest values from measured runs.
+
+        min_ram covers the worst peak seen; min_cpu covers the 95th
+        percentile of the per-run CPU demand. When the capacity of a target
+        node (millicores / MB) is given, copies_per_node reports how many
+        instances fit on it. That is packing advice only: the manifest's
+        concurrency sets how many job instances the network runs, so it is
+        never derived from it.
+        """
+        if not runs:
+            raise ValueError("At least one measured run is required")
+        if any(not run.get("peak_memory_mb") for run in runs):
+            raise RuntimeError("No memory measurement for a run; cannot size min_ram safely")
+
+        peak_memory_mb = max(run["peak_memory_mb"] for run in runs)
+        p95_cpu_percent = _percentile([self._run_cpu_percent(run) for run in runs], 95)
+
+        min_ram = _round_up(peak_memory_mb * self.memory_headroom, RAM_STEP_MB)
+        # 100% CPU is one core, i.e. 1000 millicores
+        min_cpu = _round_up(p95_cpu_percent * 10 * self.cpu_headroom, CPU_STEP_MILLICORES)
+
+        recommendation = {
+            "measured_peak_memory_mb": peak_memory_mb,
+            "measured_p95_cpu_percent": p95_cpu_percent,
+            "min_ram": min_ram,
+            "min_cpu": min_cpu,
+            "copies_per_node": None,
+        }
+        if node_cpu and node_ram:
+            recommendation["copies_per_node"] = max(1, min(node_cpu // min_cpu, node_ram // min_ram))
+        return recommendation
+
+    def apply(self, tag: str, cases: List[Dict[str, str]], node_cpu: Optional[int] = None,
+              node_ram: Optional[int] = None) -> Dict[str, Any]:
+        """Measure, update the builder's min_cpu / min_ram and regenerate the manifest"""
+        recommendation = self.recommend(self.measure(tag, cases), node_cpu, node_ram)
+        config = self.builder.config
+        self.logger.info(
+            f"Resizing {config.module_name}: cpu {config.min_cpu} -> {recommendation['min_cpu']}, "
+            f"ram {config.min_ram} -> {recommendation['min_ram']}"
+        )
+
+        config.min_cpu = recommendation["min_cpu"]
+        config.min_ram = recommendation["min_ram"]
+        self.builder.generate_manifest()
+        return recommendation
@@ -27,6 +27,14 @@ if __name__ == "__main__":
         "MODEL_INPUT": "Explain quantum computing"
     })
     print("Local test result:", test_result)
+
+    # Run a batch of prompts against two warm containers
+    report = publisher.run_test_matrix([
+        {"MODEL_INPUT": "Explain quantum computing"},
+        {"MODEL_INPUT": "Summarise the plot of Hamlet"},
+        {"MODEL_INPUT": "Write a haiku about frogs"},
+    ], workers=2)
+    print("Mean latency:", report["mean_latency_s"], "Cold starts:", report["workers"])
     
     # Deploy to network
     cid = publisher.deploy_to_lilypad()
@@ -0,0 +1,107 @@
+import time
+import random
+import threading
+from typing import Optional
+
+
+class DeadlineExceededError(RuntimeError):
+    """Raised when a call runs past its deadline"""
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the service while its circuit breaker is open"""
+
+
+class Deadline:
+    """An absolute point in time that a call and its retries must finish by"""
+
+    def __init__(self, timeout: Optional[float]):
+        self.expires_at = None if timeout is None else time.monotonic() + timeout
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None for no deadline"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def check(self, what: str):
+        if self.expired():
+            raise DeadlineExceededError(f"Deadline exceeded during {what}")
+
+    def cap(self, timeout: float) -> float:
+        """Clamp a per-operation timeout to the time left"""
+        remaining = self.remaining()
+        # Transports reject a zero timeout; check() catches true expiry
+        return timeout if remaining is None else max(0.001, min(timeout, remaining))
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, bounded both by attempts and by a
+    total budget of time spent sleeping between attempts.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.25,
+                 max_delay: float = 4.0, budget: float = 10.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+
+    def delays(self):
+        """Yield the sleep before each retry until attempts or budget run out"""
+        spent = 0.0
+        for attempt in range(1, self.max_attempts):
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+            if spent + delay > self.budget:
+                return
+            spent += delay
+            yield delay
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated failures of one endpoint or model.
+
+    After failure_threshold consecutive failures the breaker opens and
+    calls are rejected for reset_timeout seconds. It then lets a single
+    trial call through (half-open); success closes it, failure reopens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(
+                        f"Circuit for {self.name} is open after {self.failures} failures; failing fast"
+                    )
+                self.state = self.HALF_OPEN
+            elif self.state == self.HALF_OPEN:
+                # Only the single trial call is allowed through
+                raise CircuitOpenError(f"Circuit for {self.name} is half-open; trial call in progress")
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
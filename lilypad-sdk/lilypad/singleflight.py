@@ -0,0 +1,69 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from lilypad.resilience import DeadlineExceededError
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls.
+
+    While a call for a key is in flight, other callers with the same key
+    wait for it and receive its result (or exception) instead of making
+    their own call. Once it returns, the next call for the key runs anew,
+    so nothing is cached beyond the lifetime of the in-flight call.
+
+    A waiting caller is bounded by its own timeout, not the leader's.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if not call.event.wait(timeout):
+                raise DeadlineExceededError(f"Deadline exceeded waiting for in-flight call {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Calls executed, calls served from another caller's flight, and the total"""
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "total": self.executed + self.coalesced,
+            }
@@ -0,0 +1,266 @@
+import abc
+import json
+import time
+import base64
+import hashlib
+import threading
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+def request_key(method: str, url: str, json_body: Any = None) -> str:
+    """
+    Canonical hash of a request, used to match replayed responses.
+
+    Only the method, URL path/query and JSON body take part, so recordings
+    replay against any base host and without the API key.
+    """
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    canonical = json.dumps([method.upper(), path, json_body], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Transport(abc.ABC):
+    """
+    Sends HTTP requests for LilypadClient.
+
+    Implementations return an object with the subset of the requests.Response
+    interface the client relies on: status_code, headers, text, content,
+    json(), iter_lines(), iter_content(), close() and use as a context manager.
+    """
+
+    @abc.abstractmethod
+    def request(self, method: str, url: str, headers: Dict[str, str],
+                json: Any = None, stream: bool = False, **kwargs) -> Any:
+        """Send one request and return a response-like object"""
+
+
+class RequestsTransport(Transport):
+    """Default transport: a pooled requests.Session"""
+
+    def __init__(self, pool_maxsize: int = 32):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, url, headers, json=None, stream=False, **kwargs):
+        return self.session.request(method, url, headers=headers, json=json, stream=stream, **kwargs)
+
+
+class _RecordingResponse:
+    """Proxies a streamed response, capturing what the caller reads and when"""
+
+    def __init__(self, response, started: float, on_done: Callable[[Dict[str, Any]], None]):
+        self._response = response
+        self._started = started
+        self._on_done = on_done
+        self._saved = False
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    @property
+    def content(self) -> bytes:
+        # Callers read the whole body of streamed error responses
+        content = self._response.content
+        self._save({
+            "latency": round(time.perf_counter() - self._started, 4),
+            "body": base64.b64encode(content).decode("ascii"),
+        })
+        return content
+
+    @property
+    def text(self) -> str:
+        self.content
+        return self._response.text
+
+    def json(self, **kwargs) -> Any:
+        self.content
+        return self._response.json(**kwargs)
+
+    def iter_lines(self, decode_unicode: bool = False, **kwargs) -> Iterator:
+        lines: List[List[Any]] = []
+        last = self._started
+        # Read chunks as they arrive rather than filling a fixed buffer, so
+        # the recorded delays match what the server actually sent
+        kwargs.setdefault("chunk_size", None)
+        try:
+            for line in self._response.iter_lines(**kwargs):
+                now = time.perf_counter()
+                text = line.decode("utf-8") if isinstance(line, bytes) else line
+                lines.append([round(now - last, 4), text])
+                last = now
+                yield text if decode_unicode else text.encode("utf-8")
+        finally:
+            # Saved even when the caller stops early (e.g. at "data: [DONE]")
+            self._save({"lines": lines})
+
+    def iter_content(self, chunk_size: Optional[int] = 1, decode_unicode: bool = False) -> Iterator[bytes]:
+        body = bytearray()
+        first_byte = None
+        try:
+            for block in self._response.iter_content(chunk_size=chunk_size):
+                if first_byte is None:
+                    first_byte = time.perf_counter() - self._started
+                body.extend(block)
+                yield block
+        finally:
+            self._save({"latency": round(first_byte or 0.0, 4), "body": base64.b64encode(body).decode("ascii")})
+
+    def _save(self, captured: Dict[str, Any]):
+        if not self._saved:
+            self._saved = True
+            self._on_done(captured)
+
+    def close(self):
+        self._response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordingTransport(Transport):
+    """
+    Records every request/response pair to a JSONL cassette file.
+
+    Streamed responses are stored line by line with the delay before each
+    line, so replays reproduce realistic SSE timing.
+    """
+
+    def __init__(self, cassette_path: str, inner: Optional[Transport] = None):
+        self.cassette_path = cassette_path
+        self.inner = inner or RequestsTransport()
+        self._lock = threading.Lock()
+
+    def request(self, method, url, headers, json=None, stream=False, **kwargs):
+        started = time.perf_counter()
+        response = self.inner.request(method, url, headers, json=json, stream=stream, **kwargs)
+        entry = {
+            "key": request_key(method, url, json),
+            "method": method.upper(),
+            "url": urlsplit(url).path,
+            "status": response.status_code,
+            "headers": {"Content-Type": response.headers.get("Content-Type", "")},
+        }
+
+        if not stream:
+            entry["latency"] = round(time.perf_counter() - started, 4)
+            entry["body"] = base64.b64encode(response.content).decode("ascii")
+            self._write(entry)
+            return response
+
+        return _RecordingResponse(response, started, lambda captured: self._write({**entry, **captured}))
+
+    def _write(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._lock, open(self.cassette_path, "a") as f:
+            f.write(line + "\n")
+
+
+class ReplayResponse:
+    """A recorded response served back with optional original timing"""
+
+    def __init__(self, entry: Dict[str, Any], speed: Optional[float]):
+        self._entry = entry
+        self._speed = speed
+        self._latency_pending = True
+        self.status_code = entry["status"]
+        self.headers = CaseInsensitiveDict(entry.get("headers", {}))
+
+    def _sleep(self, delay: float):
+        if self._speed:
+            time.sleep(delay / self._speed)
+
+    def wait_latency(self):
+        """Wait out the recorded time to first byte, once"""
+        if self._latency_pending:
+            self._latency_pending = False
+            self._sleep(self._entry.get("latency", 0.0))
+
+    @property
+    def content(self) -> bytes:
+        if "lines" in self._entry:
+            return "\n".join(line for _, line in self._entry["lines"]).encode("utf-8")
+        return base64.b64decode(self._entry.get("body", ""))
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def iter_lines(self, decode_unicode: bool = False, **kwargs) -> Iterator:
+        if "lines" in self._entry:
+            lines = self._entry["lines"]
+        else:
+            self.wait_latency()
+            lines = [[0.0, line] for line in self.text.splitlines()]
+        for delay, line in lines:
+            self._sleep(delay)
+            yield line if decode_unicode else line.encode("utf-8")
+
+    def iter_content(self, chunk_size: Optional[int] = 1, decode_unicode: bool = False) -> Iterator[bytes]:
+        self.wait_latency()
+        content = self.content
+        step = chunk_size or len(content) or 1
+        for i in range(0, len(content), step):
+            yield content[i:i + step]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplayTransport(Transport):
+    """
+    Serves responses from a cassette written by RecordingTransport.
+
+    Args:
+        cassette_path: The JSONL cassette file
+        speed: 1.0 replays at recorded speed, 10.0 ten times faster,
+            None instantly.
+
+    Identical requests recorded several times are replayed in recorded
+    order; once exhausted, the last recording is repeated.
+    """
+
+    def __init__(self, cassette_path: str, speed: Optional[float] = 1.0):
+        self.speed = speed
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        with open(cassette_path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+
+    def request(self, method, url, headers, json=None, stream=False, **kwargs):
+        key = request_key(method, url, json)
+        with self._lock:
+            recorded = self._entries.get(key)
+            if not recorded:
+                raise LookupError(f"No recorded response for {method.upper()} {url}")
+            entry = recorded.popleft() if len(recorded) > 1 else recorded[0]
+
+        response = ReplayResponse(entry, self.speed)
+        if not stream:
+            response.wait_latency()
+        return response
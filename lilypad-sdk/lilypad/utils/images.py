@@ -0,0 +1,81 @@
+import io
+import base64
+import hashlib
+from collections import OrderedDict
+from typing import List, Tuple, Union
+
+from langchain_core.messages import HumanMessage
+
+# llava:7b uses a CLIP ViT-L/14 encoder at 336x336; larger inputs are
+# downscaled by the server anyway, so sending more pixels only costs bandwidth
+LLAVA_NATIVE_RESOLUTION = 336
+
+_CACHE_SIZE = 256
+_encoded_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+
+
+def _file_sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def encode_image(
+    path: str,
+    max_side: int = LLAVA_NATIVE_RESOLUTION,
+    quality: int = 85,
+) -> str:
+    """
+    Downscale an image file and return it as a base64 JPEG data URL.
+
+    The image is rotated upright per its EXIF orientation and shrunk so its
+    longest side is at most max_side (JPEGs are decoded at reduced size
+    directly), then re-encoded as JPEG. Results are
+    cached by file content hash, so repeated images are encoded once.
+
+    Requires Pillow.
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError as e:
+        raise ImportError("encode_image requires Pillow: pip install 'lilypad-python[images]'") from e
+
+    key = (_file_sha256(path), max_side, quality)
+    if key in _encoded_cache:
+        _encoded_cache.move_to_end(key)
+        return _encoded_cache[key]
+
+    with Image.open(path) as image:
+        # For JPEGs this makes the decoder skip most of the full-size pixels
+        image.draft("RGB", (max_side, max_side))
+        # The re-encoded JPEG carries no EXIF, so bake the orientation in
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+
+    data_url = "data:image/jpeg;base64," + base64.b64encode(buffer.getbuffer()).decode("ascii")
+    _encoded_cache[key] = data_url
+    if len(_encoded_cache) > _CACHE_SIZE:
+        _encoded_cache.popitem(last=False)
+    return data_url
+
+
+def build_vision_message(
+    text: str,
+    images: Union[str, List[str]],
+    max_side: int = LLAVA_NATIVE_RESOLUTION,
+    quality: int = 85,
+) -> HumanMessage:
+    """
+    Build a multimodal message from a text prompt and one or more image paths,
+    ready to pass to a vision model such as get_vision_llm().
+    """
+    if isinstance(images, str):
+        images = [images]
+    content = [{"type": "text", "text": text}]
+    for path in images:
+        content.append({
+            "type": "image_url",
+            "image_url": {"url": encode_image(path, max_side=max_side, quality=quality)},
+        })
+    return HumanMessage(content=content)
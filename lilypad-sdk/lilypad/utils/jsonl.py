@@ -0,0 +1,31 @@
+import os
+
+_SCAN_BLOCK = 64 * 1024
+
+
+def truncate_partial_line(path: str):
+    """
+    Drop a trailing line left incomplete by an interrupted write.
+
+    Only the tail is read: the file is scanned backwards from the end for
+    the last newline, so memory use does not grow with the file.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b'\n':
+            return
+        position = end
+        while position > 0:
+            start = max(0, position - _SCAN_BLOCK)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b'\n')
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return
+            position = start
+        f.truncate(0)
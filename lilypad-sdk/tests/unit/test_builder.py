@@ -0,0 +1,62 @@
+import importlib
+import json
+import sys
+
+import docker
+import pytest
+
+from lilypad.module_builder.builder import LilypadModuleBuilder
+from lilypad.module_builder.config import ModuleConfig
+
+
+@pytest.fixture
+def render(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(docker, "from_env", lambda: None)
+
+    def make(**config):
+        builder = LilypadModuleBuilder(ModuleConfig(module_name="sentiment", model_name="distilgpt2", **config))
+        builder.create_directory_structure().create_inference_template()
+        return (builder.module_dir / "src/run_inference.py").read_text()
+    return make
+
+
+def test_inference_script_compiles_with_defaults(render):
+    source = render()
+    compile(source, "run_inference.py", "exec")
+    assert "QUANTIZATION = None" in source
+    assert "NUM_THREADS = None" in source
+    assert '"""' not in source.splitlines()[0]
+
+
+def test_inference_script_renders_python_literals(render):
+    source = render(gpu=True, quantization="4bit", num_threads=4, torch_dtype="bfloat16")
+    compile(source, "run_inference.py", "exec")
+    assert "QUANTIZATION = '4bit'" in source
+    assert "NUM_THREADS = 4" in source
+    assert 'model_kwargs["device_map"] = "auto"' in source
+
+
+def test_manifest_and_download_script_render_valid_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(docker, "from_env", lambda: None)
+    builder = LilypadModuleBuilder(ModuleConfig(module_name="sentiment", model_repo="distilgpt2", gpu=True))
+    builder.create_directory_structure().generate_manifest().add_model_download_script()
+
+    manifest = json.loads((builder.module_dir / "lilypad_module.json.tmpl").read_text())
+    assert manifest["machine"]["gpu"] == 1
+    assert manifest["job"]["Spec"]["Docker"]["Image"] == "sentiment:1.0.0"
+    compile((builder.module_dir / "src/download_model.py").read_text(), "download_model.py", "exec")
+
+
+def test_decorators_import_without_builder_extra(monkeypatch):
+    # Generated modules import the decorators inside images without docker or jinja2
+    for name in [m for m in sys.modules if m.startswith("lilypad.module_builder")]:
+        monkeypatch.delitem(sys.modules, name)
+    monkeypatch.setitem(sys.modules, "docker", None)
+    monkeypatch.setitem(sys.modules, "jinja2", None)
+
+    decorators = importlib.import_module("lilypad.module_builder.decorators")
+    assert hasattr(decorators, "ModuleDecorators")
+    with pytest.raises(ImportError):
+        importlib.import_module("lilypad.module_builder").LilypadModuleBuilder
@@ -0,0 +1,92 @@
+import argparse
+import json
+import threading
+
+from lilypad.cli import BatchCheckpoint, run_batch
+
+
+class FakeClient:
+    """Answers chat completions with the prompt upper-cased, failing prompts in `failing`"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def chat_completion(self, messages, model, temperature):
+        prompt = messages[-1]["content"]
+        with self._lock:
+            self.prompts.append(prompt)
+        if prompt in self.failing:
+            raise RuntimeError(f"Circuit for chat:{model} is open")
+        return {"choices": [{"message": {"content": prompt.upper()}}]}
+
+
+def make_args(tmp_path, prompts, **overrides):
+    input_path = tmp_path / "prompts.jsonl"
+    input_path.write_text("".join(json.dumps(p) + "\n" for p in prompts))
+    args = dict(
+        input=str(input_path), output=str(tmp_path / "results.jsonl"), model="llama3.1:8b",
+        temperature=0.0, concurrency=4, rate=None, timeout=30.0, checkpoint=None,
+        checkpoint_every=1, api_key="key",
+    )
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def read_output(args):
+    with open(args.output) as f:
+        return {r["line"]: r["response"]["choices"][0]["message"]["content"] for r in map(json.loads, f)}
+
+
+def test_checkpoint_watermark_advances_in_order_and_stops_at_failures(tmp_path):
+    checkpoint = BatchCheckpoint(str(tmp_path / "ckpt"))
+    for line in range(5):
+        checkpoint.track(line, (line + 1) * 10)
+
+    checkpoint.complete(1)
+    assert (checkpoint.line, checkpoint.offset) == (0, 0)
+    checkpoint.complete(0)
+    assert (checkpoint.line, checkpoint.offset) == (2, 20)
+
+    checkpoint.fail(2)
+    checkpoint.complete(3)
+    assert (checkpoint.line, checkpoint.offset) == (2, 20)
+    assert checkpoint.processed_offset == 40
+
+    checkpoint.save()
+    resumed = BatchCheckpoint(str(tmp_path / "ckpt"))
+    assert (resumed.line, resumed.offset) == (2, 20)
+
+
+def test_failed_lines_are_retried_on_rerun(tmp_path):
+    args = make_args(tmp_path, ["a", "bad", "c", "d"])
+
+    assert run_batch(args, client=FakeClient(failing={"bad"})) == 1
+    assert read_output(args) == {0: "A", 2: "C", 3: "D"}
+    with open(f"{args.output}.errors.jsonl") as f:
+        assert [json.loads(line)["line"] for line in f] == [1]
+
+    client = FakeClient()
+    assert run_batch(args, client=client) == 0
+    # Only the failed line is sent again; lines written past it are recovered from the output
+    assert client.prompts == ["bad"]
+    assert read_output(args) == {0: "A", 1: "BAD", 2: "C", 3: "D"}
+    assert not (tmp_path / "results.jsonl.errors.jsonl").exists()
+
+
+def test_resume_skips_written_lines_and_drops_partial_record(tmp_path):
+    args = make_args(tmp_path, ["a", "b", "c", "d"])
+    with open(args.output, "w") as f:
+        f.write(json.dumps({"line": 0, "response": {"choices": [{"message": {"content": "A"}}]}}) + "\n")
+        f.write(json.dumps({"line": 2, "response": {"choices": [{"message": {"content": "C"}}]}}) + "\n")
+        f.write('{"line": 3, "resp')
+    with open(f"{args.output}.checkpoint", "w") as f:
+        json.dump({"line": 1, "offset": len('"a"\n')}, f)
+
+    client = FakeClient()
+    assert run_batch(args, client=client) == 0
+    assert sorted(client.prompts) == ["b", "d"]
+    assert read_output(args) == {0: "A", 1: "B", 2: "C", 3: "D"}
+    with open(f"{args.output}.checkpoint") as f:
+        assert json.load(f) == {"line": 4, "offset": len('"a"\n"b"\n"c"\n"d"\n')}
@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from lilypad.client import LilypadClient
+from lilypad.resilience import CircuitOpenError, DeadlineExceededError, RetryPolicy
+from lilypad.transport import Transport
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class _Response:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body if body is not None else {"data": {"models": ["llama3.1:8b"]}}
+        self.text = json.dumps(self.body)
+
+    def json(self):
+        return self.body
+
+    def close(self):
+        pass
+
+
+class ScriptedTransport(Transport):
+    """Plays back a list of status codes or exceptions, then answers 200"""
+
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.calls = []
+
+    def request(self, method, url, headers, json=None, stream=False, **kwargs):
+        self.calls.append((method, url, kwargs.get("timeout")))
+        step = self.script.pop(0) if self.script else 200
+        if isinstance(step, Exception):
+            raise step
+        body = {"choices": [{"message": {"content": "ok"}}]} if method == "POST" else None
+        return _Response(step, body)
+
+
+def client_for(transport, **kwargs):
+    kwargs.setdefault("retry_policy", RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.001))
+    return LilypadClient("key", transport=transport, coalesce=False, **kwargs)
+
+
+def test_get_retries_connection_errors_429_and_5xx():
+    transport = ScriptedTransport([ConnectionError("reset"), 429])
+    assert client_for(transport).get_available_models() == ["llama3.1:8b"]
+    assert len(transport.calls) == 3
+
+
+def test_get_gives_up_after_the_retry_policy():
+    transport = ScriptedTransport([503, 503, 503, 503])
+    with pytest.raises(RuntimeError, match="503"):
+        client_for(transport).get_available_models()
+    assert len(transport.calls) == 3
+
+
+def test_client_errors_and_posts_are_not_retried():
+    transport = ScriptedTransport([404])
+    with pytest.raises(RuntimeError, match="404"):
+        client_for(transport).get_available_models()
+    assert len(transport.calls) == 1
+
+    transport = ScriptedTransport([503])
+    with pytest.raises(RuntimeError, match="503"):
+        client_for(transport).chat_completion(MESSAGES, "llama3.1:8b")
+    assert len(transport.calls) == 1
+
+
+def test_breaker_fails_fast_per_circuit():
+    transport = ScriptedTransport([500, 500])
+    client = client_for(transport, breaker_failure_threshold=2, retry_policy=RetryPolicy(max_attempts=1))
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            client.chat_completion(MESSAGES, "llama3.1:8b")
+
+    with pytest.raises(CircuitOpenError):
+        client.chat_completion(MESSAGES, "llama3.1:8b")
+    assert len(transport.calls) == 2
+    # Other models have their own breaker
+    assert client.chat_completion(MESSAGES, "phi4-mini:3.8b")["choices"][0]["message"]["content"] == "ok"
+    assert client.breakers["chat:llama3.1:8b"].state == "open"
+
+
+def test_socket_timeouts_are_capped_by_the_deadline():
+    transport = ScriptedTransport()
+    client = client_for(transport, connect_timeout=10, read_timeout=120)
+    client.get_available_models()
+    client.get_available_models(timeout=2)
+
+    assert transport.calls[0][2] == (10, 120)
+    connect, read = transport.calls[1][2]
+    assert connect <= 2 and read <= 2
+
+
+class StallingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        line = b'data: {"choices": [{"index": 0, "delta": {"content": "Hel"}}]}\n\n'
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+        # Stalls well past the caller's deadline
+        time.sleep(3)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_stalled_stream_is_cut_off_at_the_deadline():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StallingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = LilypadClient("key", base_url=f"http://127.0.0.1:{server.server_port}", read_timeout=30)
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            client.chat_completion(MESSAGES, "llama3.1:8b", stream=True, timeout=0.5)
+        assert time.monotonic() - start < 1.5
+    finally:
+        server.shutdown()
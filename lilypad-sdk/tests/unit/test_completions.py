@@ -0,0 +1,88 @@
+import importlib
+import json
+import sys
+
+import pytest
+
+import lilypad.completions
+
+COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 1700000000,
+    "model": "llama3.1:8b",
+    "system_fingerprint": "fp_1",
+    "choices": [{
+        "index": 0,
+        "message": {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{"id": "call_1", "type": "function",
+                            "function": {"name": "lookup", "arguments": "{\"q\": \"x\"}"}}],
+        },
+        "finish_reason": "tool_calls",
+        "logprobs": {"content": []},
+    }],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 7, "total_tokens": 12},
+    "provider_extra": "dropped",
+}
+
+CHUNK = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion.chunk",
+    "created": 1700000000,
+    "model": "llama3.1:8b",
+    "choices": [{"index": 0, "delta": {"content": "Hel"}, "finish_reason": None}],
+}
+
+
+@pytest.fixture(params=["msgspec", "fallback"])
+def completions(request, monkeypatch):
+    if request.param == "msgspec":
+        pytest.importorskip("msgspec")
+        yield lilypad.completions
+    else:
+        monkeypatch.setitem(sys.modules, "msgspec", None)
+        yield importlib.reload(lilypad.completions)
+        monkeypatch.undo()
+        importlib.reload(lilypad.completions)
+
+
+def test_decodes_typed_completion(completions):
+    completion = completions.ChatCompletion.from_json(json.dumps(COMPLETION).encode())
+    choice = completion.choices[0]
+
+    assert isinstance(choice, completions.Choice)
+    assert completion.model == "llama3.1:8b"
+    assert completion.usage.total_tokens == 12
+    assert choice.message.tool_calls[0]["function"]["name"] == "lookup"
+    assert completion["choices"][0]["message"]["tool_calls"] == COMPLETION["choices"][0]["message"]["tool_calls"]
+    assert completion["system_fingerprint"] == "fp_1"
+    assert choice.get("logprobs") == {"content": []}
+    assert "provider_extra" not in completion
+    with pytest.raises(KeyError):
+        completion["provider_extra"]
+
+
+def test_to_dict_round_trips_known_fields(completions):
+    completion = completions.ChatCompletion.from_json(json.dumps(COMPLETION))
+    expected = {key: value for key, value in COMPLETION.items() if key != "provider_extra"}
+    assert completion.to_dict() == expected
+    assert completions.ChatCompletion.from_dict(expected).to_dict() == expected
+
+
+def test_decodes_stream_chunk_with_defaults(completions):
+    chunk = completions.ChatCompletionChunk.from_json(json.dumps(CHUNK))
+    delta = chunk.choices[0].delta
+
+    assert delta.content == "Hel"
+    assert delta.role is None and delta.tool_calls is None
+    assert chunk.usage is None and chunk.system_fingerprint is None
+    assert chunk.to_dict()["choices"][0]["delta"] == {"role": None, "content": "Hel", "tool_calls": None}
+
+
+def test_repeated_strings_are_interned(completions):
+    first = completions.ChatCompletionChunk.from_json(json.dumps(CHUNK))
+    second = completions.ChatCompletionChunk.from_json(json.dumps(CHUNK))
+    assert first.model is second.model
+    assert first.id is second.id
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from lilypad.module_builder.decorators import ModuleDecorators
+
+
+def make_handler(tmp_path, calls, chunk_size=2, flush_every=1):
+    output = str(tmp_path / "results.jsonl")
+
+    @ModuleDecorators.jsonl_input(chunk_size=chunk_size, input_dir=str(tmp_path / "inputs"), output_path=output)
+    @ModuleDecorators.jsonl_output(flush_every=flush_every, output_path=output)
+    def handler(chunks):
+        for chunk in chunks:
+            calls.append([record["id"] for record in chunk])
+            for record in chunk:
+                yield {"id": record["id"], "output": str(record["input"]).upper()}
+
+    return handler, output
+
+
+def read_results(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def inputs_dir(tmp_path):
+    directory = tmp_path / "inputs"
+    directory.mkdir()
+    return directory
+
+
+def test_jsonl_input_chunks_files_lazily(tmp_path, inputs_dir):
+    (inputs_dir / "a.jsonl").write_text('"a"\n{"id": "x", "input": "b"}\n\n"c"\n')
+    calls = []
+    handler, output = make_handler(tmp_path, calls)
+
+    assert handler() == output
+    assert calls == [["a.jsonl:0", "x"], ["a.jsonl:3"]]
+    assert [r["output"] for r in read_results(output)] == ["A", "B", "C"]
+
+
+def test_resume_skips_completed_and_drops_partial_line(tmp_path, inputs_dir):
+    (inputs_dir / "a.jsonl").write_text('"a"\n"b"\n"c"\n')
+    output = tmp_path / "results.jsonl"
+    output.write_text('{"id": "a.jsonl:0", "output": "A"}\n{"id": "a.jsonl:1", "out')
+    calls = []
+    handler, _ = make_handler(tmp_path, calls)
+
+    handler()
+    assert calls == [["a.jsonl:1", "a.jsonl:2"]]
+    assert [r["id"] for r in read_results(output)] == ["a.jsonl:0", "a.jsonl:1", "a.jsonl:2"]
+
+
+def test_env_input_ids_depend_on_content(tmp_path, monkeypatch):
+    calls = []
+    handler, output = make_handler(tmp_path, calls)
+
+    monkeypatch.setenv("MODEL_INPUT", "hello")
+    handler()
+    monkeypatch.setenv("MODEL_INPUT", "goodbye")
+    handler()
+
+    assert [r["output"] for r in read_results(output)] == ["HELLO", "GOODBYE"]
+
+    # Rerunning the same input is a resume and does no work
+    handler()
+    assert len(calls) == 2
+
+
+def test_env_input_json_list_keeps_duplicates(tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_INPUT", json.dumps(["same", "same"]))
+    calls = []
+    handler, output = make_handler(tmp_path, calls)
+
+    handler()
+    assert len(read_results(output)) == 2
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+
+from lilypad.client import LilypadClient
+from lilypad.transport import Transport
+
+
+class _ImageResponse:
+    def __init__(self, status_code, blocks, text=""):
+        self.status_code = status_code
+        self.blocks = blocks
+        self.text = text
+
+    def iter_content(self, chunk_size=1):
+        for block in self.blocks:
+            if isinstance(block, Exception):
+                raise block
+            yield block
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ImageTransport(Transport):
+    """Returns the prompt as image bytes; prompts in `broken` fail mid-download, `rejected` get a 400"""
+
+    def __init__(self, broken=(), rejected=()):
+        self.broken = set(broken)
+        self.rejected = set(rejected)
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, headers, json=None, stream=False, **kwargs):
+        prompt = json["prompt"]
+        with self._lock:
+            self.prompts.append(prompt)
+        time.sleep(0.01)
+        if prompt in self.rejected:
+            return _ImageResponse(400, [], text="prompt rejected")
+        if prompt in self.broken:
+            return _ImageResponse(200, [b"half an ", ConnectionResetError("connection reset")])
+        return _ImageResponse(200, [prompt.encode(), b"-png"])
+
+
+def test_dedups_prompts_and_keeps_input_order(tmp_path):
+    transport = ImageTransport()
+    client = LilypadClient("key", transport=transport)
+    result = client.generate_images(["cat", "dog", "cat"], "sdxl-turbo", str(tmp_path), max_concurrency=4)
+
+    assert sorted(transport.prompts) == ["cat", "dog"]
+    assert result["generated"] == 2 and result["skipped"] == 0 and result["failed"] == 0
+    cat, dog, cat_again = result["paths"]
+    assert cat == cat_again != dog
+    with open(cat, "rb") as f:
+        assert f.read() == b"cat-png"
+    with open(dog, "rb") as f:
+        assert f.read() == b"dog-png"
+
+
+def test_rerun_skips_existing_images(tmp_path):
+    LilypadClient("key", transport=ImageTransport()).generate_images(["cat"], "sdxl-turbo", str(tmp_path))
+
+    transport = ImageTransport()
+    result = LilypadClient("key", transport=transport).generate_images(["cat", "owl"], "sdxl-turbo", str(tmp_path))
+    assert transport.prompts == ["owl"]
+    assert result["skipped"] == 1 and result["generated"] == 1
+
+    # Images are keyed on the model as well as the prompt
+    other = LilypadClient("key", transport=ImageTransport()).generate_images(["cat"], "flux", str(tmp_path))
+    assert other["generated"] == 1
+
+
+def test_failures_are_counted_and_leave_no_partial_files(tmp_path):
+    transport = ImageTransport(broken={"storm"}, rejected={"nsfw"})
+    client = LilypadClient("key", transport=transport)
+    result = client.generate_images(["storm", "sun", "nsfw"], "sdxl-turbo", str(tmp_path))
+
+    assert result["failed"] == 2 and result["generated"] == 1
+    assert result["paths"][0] is None and result["paths"][2] is None
+    assert os.path.exists(result["paths"][1])
+    assert "connection reset" in result["errors"]["storm"]
+    assert "400" in result["errors"]["nsfw"]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+
+    # The failed prompts are retried on the next run
+    retry = LilypadClient("key", transport=ImageTransport()).generate_images(
+        ["storm", "sun", "nsfw"], "sdxl-turbo", str(tmp_path)
+    )
+    assert retry["generated"] == 2 and retry["skipped"] == 1
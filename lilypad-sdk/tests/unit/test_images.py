@@ -0,0 +1,41 @@
+import base64
+import io
+
+import pytest
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image
+
+from lilypad.utils.images import build_vision_message, encode_image
+
+
+def decode(data_url):
+    header, payload = data_url.split(",", 1)
+    assert header == "data:image/jpeg;base64"
+    return Image.open(io.BytesIO(base64.b64decode(payload)))
+
+
+def test_encode_image_downscales_and_applies_exif_rotation(tmp_path):
+    path = tmp_path / "photo.jpg"
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise to display
+    Image.new("RGB", (1200, 800), "red").save(path, exif=exif)
+
+    image = decode(encode_image(str(path), max_side=336))
+    # Stored landscape, displayed portrait
+    assert image.size == (224, 336)
+
+
+def test_encode_image_is_cached_by_content(tmp_path):
+    first, second = tmp_path / "a.png", tmp_path / "b.png"
+    Image.new("RGB", (50, 50), "blue").save(first)
+    second.write_bytes(first.read_bytes())
+    assert encode_image(str(first)) is encode_image(str(second))
+
+
+def test_build_vision_message(tmp_path):
+    path = tmp_path / "a.png"
+    Image.new("RGB", (10, 10)).save(path)
+    message = build_vision_message("Describe", str(path))
+    assert message.content[0] == {"type": "text", "text": "Describe"}
+    assert message.content[1]["image_url"]["url"].startswith("data:image/jpeg;base64,")
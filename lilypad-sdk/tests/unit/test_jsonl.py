@@ -0,0 +1,29 @@
+import pytest
+
+from lilypad.utils import jsonl
+from lilypad.utils.jsonl import truncate_partial_line
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    # Forces the backwards scan across several blocks
+    monkeypatch.setattr(jsonl, "_SCAN_BLOCK", 4)
+
+
+@pytest.mark.parametrize("content, expected", [
+    (b'{"id": 1}\n{"id": 2}\n', b'{"id": 1}\n{"id": 2}\n'),
+    (b'{"id": 1}\n{"id": 2}\n{"id": 3, "out', b'{"id": 1}\n{"id": 2}\n'),
+    (b'{"id": 1}\n' + b'x' * 50, b'{"id": 1}\n'),
+    (b'{"id": 1, "partial', b''),
+    (b'', b''),
+])
+def test_truncate_partial_line(tmp_path, content, expected):
+    path = tmp_path / "results.jsonl"
+    path.write_bytes(content)
+    truncate_partial_line(str(path))
+    assert path.read_bytes() == expected
+
+
+def test_missing_file_is_ignored(tmp_path):
+    truncate_partial_line(str(tmp_path / "missing.jsonl"))
+    assert not (tmp_path / "missing.jsonl").exists()
@@ -0,0 +1,61 @@
+import asyncio
+
+import httpx
+
+from lilypad.langchain import LilypadAsyncHttpxTransport, LilypadHttpxTransport
+from lilypad.transport import Transport
+
+
+class _Response:
+    status_code = 429
+    headers = {
+        "Content-Type": "application/json",
+        "Content-Encoding": "gzip",
+        "Retry-After": "3",
+        "X-Request-Id": "req-42",
+    }
+
+    def iter_lines(self):
+        yield b'{"error": "rate limited"}'
+
+    def close(self):
+        pass
+
+
+class CapturingTransport(Transport):
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, url, headers, json=None, stream=False, **kwargs):
+        self.calls.append(dict(method=method, url=url, headers=headers, json=json, **kwargs))
+        return _Response()
+
+
+def test_forwards_timeout_and_upstream_headers():
+    transport = CapturingTransport()
+    with httpx.Client(transport=LilypadHttpxTransport(transport), timeout=httpx.Timeout(30, connect=5)) as client:
+        response = client.post("https://api.example/chat/completions", json={"model": "llama3.1:8b"})
+
+    call = transport.calls[0]
+    assert call["timeout"] == (5, 30)
+    assert call["json"] == {"model": "llama3.1:8b"}
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "3"
+    assert response.headers["x-request-id"] == "req-42"
+    # The inner transport already decoded the body
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"error": "rate limited"}
+
+
+def test_async_transport_forwards_timeout_and_headers():
+    transport = CapturingTransport()
+
+    async def send():
+        async with httpx.AsyncClient(transport=LilypadAsyncHttpxTransport(transport), timeout=12) as client:
+            response = await client.get("https://api.example/models")
+            await response.aread()
+            return response
+
+    response = asyncio.run(send())
+    assert transport.calls[0]["timeout"] == (12, 12)
+    assert response.headers["x-request-id"] == "req-42"
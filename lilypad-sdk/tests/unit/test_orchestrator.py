@@ -0,0 +1,93 @@
+import threading
+
+import docker
+import pytest
+
+from lilypad.module_builder.builder import LilypadModuleBuilder
+from lilypad.module_builder.config import ModuleConfig
+from lilypad.module_builder.orchestrator import BuildOrchestrator
+
+
+@pytest.fixture
+def scaffold(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(docker, "from_env", lambda: None)
+
+    def make(name, requirements, **config):
+        builder = LilypadModuleBuilder(ModuleConfig(module_name=name, **config))
+        builder.module_dir.mkdir(parents=True)
+        builder.generate_dockerfile()
+        (builder.module_dir / "requirements.txt").write_text("\n".join(requirements))
+        return builder.config
+    return make
+
+
+INSTRUCTIONS = {"FROM", "WORKDIR", "RUN", "COPY", "ADD", "ENV", "ARG", "CMD", "ENTRYPOINT", "EXPOSE", "LABEL", "USER"}
+
+
+def instructions(dockerfile):
+    """The instruction keyword of every logical line, failing on anything Docker would reject"""
+    found, continued = [], False
+    for line in dockerfile.splitlines():
+        stripped = line.strip()
+        if not continued and stripped and not stripped.startswith("#"):
+            keyword = stripped.split(" ", 1)[0]
+            assert keyword in INSTRUCTIONS, f"not a Dockerfile instruction: {line!r}"
+            found.append(keyword)
+        continued = stripped.endswith("\\")
+    return found
+
+
+def test_generated_dockerfile_is_valid(scaffold):
+    scaffold("gpu-module", [], gpu=True, base_image="nvidia/cuda:12.1.0-runtime-ubuntu22.04")
+    dockerfile = open("modules/gpu-module/Dockerfile").read()
+    assert instructions(dockerfile)[0] == "FROM"
+    assert instructions(dockerfile)[-1] == "CMD"
+
+
+def test_dockerfile_prefix_stops_before_context_instructions(scaffold):
+    scaffold("gpu-module", [], gpu=True, base_image="nvidia/cuda:12.1.0-runtime-ubuntu22.04")
+    dockerfile = open("modules/gpu-module/Dockerfile").read()
+    prefix = BuildOrchestrator.dockerfile_prefix(dockerfile)
+
+    assert instructions(prefix) == ["FROM", "WORKDIR", "RUN"]
+    assert "FROM --platform=linux/amd64 nvidia/cuda:12.1.0-runtime-ubuntu22.04" in prefix
+    assert "nvidia-cuda-toolkit" in prefix
+    assert BuildOrchestrator.dockerfile_prefix("# no instructions\n") == ""
+
+
+def test_prefixes_are_warmed_before_groups_and_leaders_before_followers(scaffold, monkeypatch):
+    configs = [
+        scaffold("a1", ["torch", "transformers"]),
+        scaffold("a2", ["transformers", "torch"]),
+        scaffold("b1", ["torch", "diffusers"]),
+        scaffold("c1", ["torch"], gpu=True),
+    ]
+    events = []
+    lock = threading.Lock()
+
+    def warm(self, key, prefix, platform):
+        with lock:
+            events.append(("prefix", next(line for line in prefix.splitlines() if line.startswith("FROM"))))
+        return {"prefix": key, "status": "built", "duration_s": 1.0}
+
+    def build(self, builder, group):
+        with lock:
+            events.append(("module", builder.config.module_name))
+        return {"module": builder.config.module_name, "status": "built", "duration_s": 1.0,
+                "steps": 4, "cached_steps": 2}
+
+    monkeypatch.setattr(BuildOrchestrator, "_warm_prefix", warm)
+    monkeypatch.setattr(BuildOrchestrator, "_build_one", build)
+    summary = BuildOrchestrator(configs, max_parallel=1).build_all()
+
+    # Two distinct prefixes (CPU and GPU) shared by three requirement groups
+    assert len(summary["prefixes"]) == 2
+    assert summary["layer_groups"] == 3
+    assert summary["built"] == 4
+    assert summary["cache_hit_rate"] == 0.5
+
+    order = [name for _, name in events]
+    assert order.index("FROM --platform=linux/amd64 python:3.9-slim") < min(order.index("a1"), order.index("b1"))
+    assert order.index("a1") < order.index("a2")
+    assert [kind for kind, _ in events[:2]] == ["prefix", "prefix"]
@@ -0,0 +1,123 @@
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from lilypad.module_builder import publisher as publisher_module
+from lilypad.module_builder.config import ModuleConfig
+from lilypad.module_builder.publisher import ModulePublisher
+
+
+class FakeBuilder:
+    def __init__(self, module_dir: Path, build=None):
+        self.config = ModuleConfig(module_name="sentiment")
+        self.module_dir = module_dir
+        self.build = build or (lambda tag: None)
+        self.pushed = []
+
+    def validate_module(self):
+        return True
+
+    def build_docker_image(self, tag, push=False, log=None):
+        self.build(tag)
+
+    def push_docker_image(self, tag, progress=None):
+        self.pushed.append(tag)
+
+
+@pytest.fixture
+def module_dir(tmp_path):
+    module_dir = tmp_path / "modules" / "sentiment"
+    (module_dir / "src").mkdir(parents=True)
+    (module_dir / "models").mkdir()
+    (module_dir / "src" / "run_inference.py").write_text("print('hi')\n")
+    (module_dir / "models" / "model.safetensors").write_bytes(b"\0" * 1024)
+    return module_dir
+
+
+@pytest.fixture
+def commands(monkeypatch):
+    calls = []
+
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        if cmd[:2] == ["lilypad", "publish"]:
+            return SimpleNamespace(stdout=f"bafy{len(calls)}\n", returncode=0)
+        return SimpleNamespace(stdout="", returncode=0)
+
+    monkeypatch.setattr(publisher_module.subprocess, "run", run)
+    return calls
+
+
+def publishes(calls):
+    return sum(1 for cmd in calls if cmd[:2] == ["lilypad", "publish"])
+
+
+def test_cid_cache_reuses_unchanged_modules(module_dir, commands):
+    publisher = ModulePublisher(FakeBuilder(module_dir))
+    cid = publisher.publish_to_ipfs()
+    (module_dir / "test_outputs").mkdir()
+    (module_dir / "test_outputs" / "results.jsonl").write_text("{}\n")
+
+    assert publisher.publish_to_ipfs() == cid
+    assert publishes(commands) == 1
+
+    (module_dir / "src" / "run_inference.py").write_text("print('changed')\n")
+    assert publisher.publish_to_ipfs() != cid
+    assert publishes(commands) == 2
+
+    assert publisher.publish_to_ipfs(use_cache=False)
+    assert publishes(commands) == 3
+
+
+def test_weights_are_keyed_on_size_and_mtime(module_dir):
+    publisher = ModulePublisher(FakeBuilder(module_dir))
+    weights = module_dir / "models" / "model.safetensors"
+    before = publisher.module_hash()
+
+    # Same size and mtime: not re-read, so the hash is unchanged
+    stat = weights.stat()
+    weights.write_bytes(b"\1" * 1024)
+    os.utime(weights, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert publisher.module_hash() == before
+
+    os.utime(weights, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert publisher.module_hash() != before
+
+
+def test_deploy_overlaps_image_and_ipfs_publish(module_dir, commands, monkeypatch):
+    builder = FakeBuilder(module_dir, build=lambda tag: time.sleep(0.2))
+    publisher = ModulePublisher(builder)
+    slow_publish = publisher.publish_to_ipfs
+
+    def publish(use_cache=True):
+        time.sleep(0.2)
+        return slow_publish(use_cache)
+
+    monkeypatch.setattr(publisher, "publish_to_ipfs", publish)
+    start = time.perf_counter()
+    cid = publisher.deploy_to_lilypad(network="testnet")
+
+    assert time.perf_counter() - start < 0.35
+    assert builder.pushed == ["sentiment:latest"]
+    assert commands[-1] == ["lilypad", "register-module", "--cid", cid, "--network", "testnet"]
+    assert set(publisher.last_deploy_timings) == {"build", "push", "ipfs_publish", "register", "total"}
+
+
+def test_publish_failure_is_raised_before_the_build_finishes(module_dir, monkeypatch):
+    release = threading.Event()
+    publisher = ModulePublisher(FakeBuilder(module_dir, build=lambda tag: release.wait(5)))
+
+    def fail(cmd, **kwargs):
+        raise subprocess.CalledProcessError(1, cmd, stderr="ipfs unavailable")
+
+    monkeypatch.setattr(publisher_module.subprocess, "run", fail)
+    start = time.perf_counter()
+    with pytest.raises(subprocess.CalledProcessError):
+        publisher.deploy_to_lilypad()
+    assert time.perf_counter() - start < 1.0
+    release.set()
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import threading
+import time
+
+import pydantic
+import pytest
+from langchain_core.exceptions import OutputParserException
+
+from lilypad.client import LilypadClient
+from lilypad.langchain import LilypadLLMWrapper
+from lilypad.transport import Transport
+
+
+class Answer(pydantic.BaseModel):
+    answer: str
+
+
+class _ChatResponse:
+    status_code = 200
+
+    def __init__(self, content, delay):
+        self.content_text = content
+        self.delay = delay
+        self.closed = threading.Event()
+        self.lines_sent = 0
+
+    def json(self):
+        return {"choices": [{"index": 0, "message": {"role": "assistant", "content": self.content_text}}]}
+
+    def iter_lines(self):
+        for word in self.content_text.split(" "):
+            if self.closed.wait(self.delay):
+                return
+            self.lines_sent += 1
+            chunk = {"choices": [{"index": 0, "delta": {"content": word + " "}}]}
+            yield b"data: " + json.dumps(chunk).encode()
+        yield b"data: [DONE]"
+
+    def close(self):
+        self.closed.set()
+
+
+class ModelTransport(Transport):
+    """Answers each model with fixed content after a per-model delay; `failing` models raise"""
+
+    def __init__(self, answers, delays, failing=()):
+        self.answers, self.delays, self.failing = answers, delays, set(failing)
+        self.responses = {}
+
+    def request(self, method, url, headers, json=None, stream=False, **kwargs):
+        model = json["model"]
+        if model in self.failing:
+            raise RuntimeError(f"{model} unavailable")
+        response = _ChatResponse(self.answers[model], self.delays[model])
+        self.responses[model] = response
+        if not stream:
+            time.sleep(self.delays[model])
+        return response
+
+
+def test_fastest_model_wins_and_is_recorded():
+    transport = ModelTransport({"llama3.1:8b": "slow", "phi4-mini:3.8b": "fast"},
+                               {"llama3.1:8b": 0.3, "phi4-mini:3.8b": 0.01})
+    client = LilypadClient("key", transport=transport)
+    result = client.chat_completion([{"role": "user", "content": "hi"}], "llama3.1:8b", race=["phi4-mini:3.8b"])
+
+    assert result["choices"][0]["message"]["content"] == "fast"
+    assert client.last_race["winner"] == "phi4-mini:3.8b"
+    assert client.race_wins == {"phi4-mini:3.8b": 1}
+
+
+def test_schema_rejects_invalid_fast_answer():
+    transport = ModelTransport({"llama3.1:8b": '{"answer": "42"}', "phi4-mini:3.8b": "not json"},
+                               {"llama3.1:8b": 0.05, "phi4-mini:3.8b": 0.01})
+    client = LilypadClient("key", transport=transport)
+    result = client.chat_completion([{"role": "user", "content": "hi"}], "llama3.1:8b",
+                                    race=["phi4-mini:3.8b"], schema=Answer)
+
+    assert client.last_race["winner"] == "llama3.1:8b"
+    assert Answer.model_validate_json(result["choices"][0]["message"]["content"]).answer == "42"
+    assert "1:phi4-mini:3.8b" in client.last_race["errors"]
+
+
+def test_all_failures_are_aggregated():
+    transport = ModelTransport({}, {}, failing={"llama3.1:8b", "phi4-mini:3.8b"})
+    client = LilypadClient("key", transport=transport)
+    with pytest.raises(RuntimeError) as error:
+        client.chat_completion([{"role": "user", "content": "hi"}], "llama3.1:8b", race=["phi4-mini:3.8b"])
+    assert "0:llama3.1:8b" in str(error.value) and "1:phi4-mini:3.8b" in str(error.value)
+
+
+def test_losing_streams_are_closed():
+    transport = ModelTransport({"llama3.1:8b": "a b c d e f g h", "phi4-mini:3.8b": "done"},
+                               {"llama3.1:8b": 0.1, "phi4-mini:3.8b": 0.01})
+    client = LilypadClient("key", transport=transport)
+    chunks = client.chat_completion([{"role": "user", "content": "hi"}], "llama3.1:8b",
+                                    race=["phi4-mini:3.8b"], stream=True)
+
+    assert client.last_race["winner"] == "phi4-mini:3.8b"
+    assert "".join(c["choices"][0]["delta"]["content"] for c in chunks) == "done "
+    loser = transport.responses["llama3.1:8b"]
+    assert loser.closed.is_set()
+    assert loser.lines_sent < 8
+
+
+class FakeLLM:
+    def __init__(self, result, delay):
+        self.result, self.delay = result, delay
+        self.cancelled = False
+
+    async def ainvoke(self, input, config=None):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def wrapper(llm, racers):
+    instance = LilypadLLMWrapper(api_key="key", race_models=[model for model, _ in racers])
+    instance.llm = llm
+    instance.race_llms = racers
+    return instance
+
+
+def test_wrapper_race_returns_first_success_and_cancels_losers():
+    slow = FakeLLM("slow", 1.0)
+    llm = wrapper(slow, [("phi4-mini:3.8b", FakeLLM(ValueError("boom"), 0.01)), ("qwen2.5:7b", FakeLLM("fast", 0.05))])
+
+    assert llm.invoke("hi") == "fast"
+    assert llm.last_race_winner == "qwen2.5:7b"
+    assert slow.cancelled
+
+
+def test_wrapper_race_works_inside_a_running_loop():
+    llm = wrapper(FakeLLM("slow", 0.2), [("phi4-mini:3.8b", FakeLLM("fast", 0.01))])
+
+    async def call_both():
+        return llm.invoke("hi"), await llm.ainvoke("hi")
+
+    assert asyncio.run(call_both()) == ("fast", "fast")
+    assert llm.race_wins == {"phi4-mini:3.8b": 2}
+
+
+def test_wrapper_race_coerces_parse_failures_and_aggregates_errors():
+    parse_error = OutputParserException("bad", llm_output="raw answer")
+    llm = wrapper(FakeLLM(parse_error, 0.01), [("phi4-mini:3.8b", FakeLLM(ValueError("down"), 0.01))])
+    llm.schema = Answer
+    assert llm.invoke("hi") == Answer(answer="raw answer")
+
+    llm = wrapper(FakeLLM(ValueError("down"), 0.01), [("phi4-mini:3.8b", FakeLLM(ValueError("also down"), 0.01))])
+    with pytest.raises(RuntimeError, match="All raced models failed"):
+        llm.invoke("hi")
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from lilypad.resilience import CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceededError, RetryPolicy
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker("chat:llama3.1:8b", failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError, match="chat:llama3.1:8b"):
+        breaker.before_call()
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker("models", failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 1
+
+
+def test_half_open_allows_one_trial_then_closes():
+    breaker = CircuitBreaker("models", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError, match="half-open"):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker("models", failure_threshold=5, reset_timeout=0.05)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.06)
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_retry_policy_limits_attempts():
+    delays = list(RetryPolicy(max_attempts=4, base_delay=0.1, max_delay=10, budget=100).delays())
+    assert len(delays) == 3
+    for attempt, delay in enumerate(delays):
+        assert 0 <= delay <= 0.1 * 2 ** attempt
+
+
+def test_retry_policy_caps_each_delay_and_total_budget(monkeypatch):
+    monkeypatch.setattr("lilypad.resilience.random.uniform", lambda low, high: high)
+    assert list(RetryPolicy(max_attempts=6, base_delay=1, max_delay=3, budget=100).delays()) == [1, 2, 3, 3, 3]
+    assert list(RetryPolicy(max_attempts=6, base_delay=1, max_delay=3, budget=6).delays()) == [1, 2, 3]
+    assert list(RetryPolicy(max_attempts=1).delays()) == []
+
+
+def test_deadline_check_and_cap():
+    unbounded = Deadline(None)
+    assert unbounded.remaining() is None
+    assert unbounded.cap(30) == 30
+    unbounded.check("anything")
+
+    deadline = Deadline(0.05)
+    assert deadline.cap(30) <= 0.05
+    assert deadline.cap(0.01) == 0.01
+    time.sleep(0.06)
+    assert deadline.expired()
+    assert deadline.remaining() == 0.0
+    assert deadline.cap(30) == 0.001
+    with pytest.raises(DeadlineExceededError, match="streaming"):
+        deadline.check("streaming")
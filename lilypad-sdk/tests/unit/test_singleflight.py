@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from lilypad.client import LilypadClient
+from lilypad.resilience import DeadlineExceededError
+from lilypad.singleflight import SingleFlight
+from lilypad.transport import Transport
+
+
+def wait_for(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait()
+        return {"models": ["llama3.1:8b"]}
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(flight.do, "models", fn) for _ in range(5)]
+        wait_for(lambda: flight.stats()["coalesced"] == 4)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"executed": 1, "coalesced": 4, "total": 5}
+
+    # Nothing is cached once the flight lands
+    flight.do("models", fn)
+    assert len(calls) == 2
+
+
+def test_leader_error_reaches_every_caller():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fn():
+        release.wait()
+        raise RuntimeError("Error fetching models: 503")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flight.do, "models", fn) for _ in range(3)]
+        wait_for(lambda: flight.stats()["coalesced"] == 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError, match="503"):
+                future.result()
+
+
+def test_follower_gives_up_at_its_own_timeout():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(flight.do, "job", lambda: release.wait() and "done")
+        wait_for(lambda: flight.stats()["executed"] == 1)
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            flight.do("job", lambda: "unused", timeout=0.05)
+        assert time.monotonic() - start < 1.0
+        release.set()
+        assert leader.result() == "done"
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+    def close(self):
+        pass
+
+
+class SlowThenOkTransport(Transport):
+    """The first request hangs past a short deadline and fails; later ones succeed"""
+
+    def __init__(self):
+        self.calls = 0
+        self.first_started = threading.Event()
+
+    def request(self, method, url, headers, json=None, stream=False, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            self.first_started.set()
+            time.sleep(0.2)
+            raise OSError("read timed out")
+        return _Response({"status": "done"})
+
+
+def test_follower_retries_when_leader_deadline_expires():
+    transport = SlowThenOkTransport()
+    client = LilypadClient("key", transport=transport)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(client.get_job_status, "job-1", timeout=0.1)
+        transport.first_started.wait(1)
+        # Joins the leader's flight, outlives its deadline and makes its own call
+        assert client.get_job_status("job-1", timeout=5) == {"status": "done"}
+        with pytest.raises(DeadlineExceededError):
+            leader.result()
+
+    assert transport.calls == 2
+    assert client.singleflight.stats()["coalesced"] == 1
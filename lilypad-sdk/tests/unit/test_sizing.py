@@ -0,0 +1,34 @@
+import pytest
+
+from lilypad.module_builder.sizing import ResourceSizer
+
+
+def sizer():
+    # recommend() only needs the headroom settings, not a builder or Docker
+    instance = ResourceSizer.__new__(ResourceSizer)
+    instance.memory_headroom, instance.cpu_headroom = 1.25, 1.2
+    return instance
+
+
+def run(memory=3000.0, cpu=180.0, cpu_seconds=None, total_s=10.0):
+    return {"peak_memory_mb": memory, "peak_cpu_percent": cpu, "cpu_seconds": cpu_seconds, "total_s": total_s}
+
+
+def test_recommend_rounds_up_with_headroom_and_reports_packing():
+    result = sizer().recommend([run(3000, 180), run(2500, 90)], node_cpu=8000, node_ram=32768)
+    assert result["min_ram"] == 3840
+    assert result["min_cpu"] == 2250
+    assert result["copies_per_node"] == 3
+    assert "concurrency" not in result
+
+
+def test_cgroup_cpu_average_covers_missed_samples():
+    result = sizer().recommend([run(cpu=None, cpu_seconds=20.0, total_s=10.0)])
+    assert result["measured_p95_cpu_percent"] == 200.0
+
+
+def test_missing_measurements_fail_instead_of_using_floors():
+    with pytest.raises(RuntimeError):
+        sizer().recommend([run(memory=None)])
+    with pytest.raises(RuntimeError):
+        sizer().recommend([run(cpu=None)])
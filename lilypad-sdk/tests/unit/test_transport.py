@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from lilypad.transport import RecordingTransport, ReplayTransport, Transport, request_key
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n" % len(data) + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        body = b'{"data": {"models": ["a"]}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if payload.get("fail"):
+            body = b"model overloaded"
+            self.send_response(503)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(3):
+            self._chunk(f"data: {json.dumps({'i': i})}\n\n".encode())
+            time.sleep(0.05)
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_transport_is_abstract():
+    with pytest.raises(TypeError):
+        Transport()
+
+
+def test_request_key_ignores_host_and_key_order():
+    assert request_key("post", "http://a/x", {"a": 1, "b": 2}) == request_key("POST", "https://b/x", {"b": 2, "a": 1})
+    assert request_key("POST", "http://a/x", {"a": 1}) != request_key("POST", "http://a/x", {"a": 2})
+
+
+def test_record_then_replay_round_trip(tmp_path, base_url):
+    cassette = str(tmp_path / "cassette.jsonl")
+    recorder = RecordingTransport(cassette)
+    assert recorder.request("GET", f"{base_url}/models", {}).json() == {"data": {"models": ["a"]}}
+    recorded_lines = [
+        line for line in recorder.request("POST", f"{base_url}/chat", {}, json={"m": 1}, stream=True)
+        .iter_lines(decode_unicode=True)
+    ]
+
+    replay = ReplayTransport(cassette, speed=None)
+    assert replay.request("GET", "http://elsewhere/models", {}).json() == {"data": {"models": ["a"]}}
+    response = replay.request("POST", "http://elsewhere/chat", {}, json={"m": 1}, stream=True)
+    assert list(response.iter_lines(decode_unicode=True)) == recorded_lines
+    assert "data: [DONE]" in recorded_lines
+
+    with pytest.raises(LookupError):
+        replay.request("POST", "http://elsewhere/chat", {}, json={"m": 2})
+
+
+def test_replay_reproduces_stream_timing(tmp_path, base_url):
+    cassette = str(tmp_path / "cassette.jsonl")
+    list(RecordingTransport(cassette).request("POST", f"{base_url}/chat", {}, json={}, stream=True).iter_lines())
+
+    start = time.perf_counter()
+    list(ReplayTransport(cassette, speed=1.0).request("POST", "http://x/chat", {}, json={}, stream=True).iter_lines())
+    assert time.perf_counter() - start >= 0.1
+
+    start = time.perf_counter()
+    list(ReplayTransport(cassette, speed=None).request("POST", "http://x/chat", {}, json={}, stream=True).iter_lines())
+    assert time.perf_counter() - start < 0.05
+
+
+def test_streamed_error_response_is_recorded(tmp_path, base_url):
+    cassette = str(tmp_path / "cassette.jsonl")
+    response = RecordingTransport(cassette).request("POST", f"{base_url}/chat", {}, json={"fail": True}, stream=True)
+    assert response.status_code == 503
+    assert response.text == "model overloaded"
+
+    replayed = ReplayTransport(cassette, speed=None).request("POST", "http://x/chat", {}, json={"fail": True}, stream=True)
+    assert replayed.status_code == 503
+    assert replayed.text == "model overloaded"